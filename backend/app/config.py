@@ -0,0 +1,37 @@
+# backend/app/config.py
+"""
+Settings read from the environment once, at first import (after load_dotenv).
+The environment doesn't change while the process runs, so request handlers use
+these attributes instead of calling os.getenv on every hit.
+"""
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class EmailConfig:
+    """Resend email settings"""
+    enabled: bool
+    api_key: Optional[str] = field(repr=False)  # Kept out of logs/tracebacks
+    from_email: str
+
+    @classmethod
+    def from_env(cls) -> "EmailConfig":
+        return cls(
+            enabled=os.getenv("EMAIL_ENABLED", "true").lower() == "true",
+            api_key=os.getenv("RESEND_API_KEY") or None,
+            from_email=os.getenv("RESEND_FROM_EMAIL") or "onboarding@resend.dev",
+        )
+
+
+EMAIL_CFG = EmailConfig.from_env()
+
+
+@lru_cache(maxsize=None)
+def get_resend():
+    """The Resend SDK, imported and given the API key on first use, so it only loads once an email is sent"""
+    import resend
+    resend.api_key = EMAIL_CFG.api_key
+    return resend
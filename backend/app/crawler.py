@@ -1,25 +1,245 @@
 # backend/crawler.py
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import httpx
 import requests
-from bs4 import BeautifulSoup, Comment
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from bs4.dammit import EncodingDetector, UnicodeDammit
+import soupsieve
+import xxhash
+from cachetools import TTLCache
+import threading
 import time
 from urllib.parse import urlparse
-from typing import Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 import re
 import logging
 
 # Set up logger for this module
 logger = logging.getLogger(__name__)
 
+# Prefer the C-based lxml parser; fall back to the pure-Python one if it's missing
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# HTTP/2 for the async client needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Content types worth extracting text from
+SUPPORTED_CONTENT_TYPES = ('text/html', 'text/plain', 'application/xhtml')
+
+# Lexbor (via selectolax) handles the hot extraction path when installed
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Elements stripped before extraction (navigation, ads, widgets...)
+UNWANTED_SELECTORS = [
+    'script', 'style', 'nav', 'footer', 'header', 'aside', 
+    'form', 'iframe', '.advertisement', '.ad', '.ads',
+    '.social-share', '.share-buttons', '.comments',
+    '.cookie-banner', '.newsletter-signup', '.popup',
+    '[role="banner"]', '[role="navigation"]', '[role="contentinfo"]'
+]
+
+# Semantic containers for the main content, in priority order
+MAIN_SELECTORS = [
+    'main', 'article', '[role="main"]', 
+    '.content', '.main-content', '#content', '.page-content',
+    '.post', '.blog-post', '.entry-content', '.post-content',
+    '.documentation', '.docs-content', '.api-content',
+    '.technical-content', '.tutorial-content', '.wiki-content',
+    '.markdown-body', '.readme', '.doc-content'
+]
+
+# Bodies larger than this are truncated while streaming rather than loaded whole
+MAX_CONTENT_BYTES = 5 * 1024 * 1024
+STREAM_CHUNK_SIZE = 65536
+
+# Whitespace runs clean_text collapses (literal replacements keep both subs in C)
+_NEWLINE_RUN = re.compile(r'\n{3,}')
+_SPACE_RUN = re.compile(r' {2,}')
+
+_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+
+class FetchedPage(NamedTuple):
+    """Raw response body plus the charset it declared (header first, then <meta>)"""
+    content: bytes
+    encoding: Optional[str]
+    etag: Optional[str] = None  # Validators to send back on the next conditional fetch
+    last_modified: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return decode_html(self.content, self.encoding)
+
+    @property
+    def content_hash(self) -> str:
+        """xxh64 of the raw body: equal hashes mean there is nothing new to extract"""
+        return xxhash.xxh64_hexdigest(self.content)
+
+
+class _Unchanged:
+    """Type of UNCHANGED: a conditional fetch got 304 Not Modified"""
+    def __repr__(self):
+        return 'UNCHANGED'
+
+
+UNCHANGED = _Unchanged()
+
+
+class _CachedText(NamedTuple):
+    """Last extraction of a URL plus the validators that let it be reused"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    text: str
+
+
+# URLs whose extracted text fetch_text_cached_async keeps for a day (each entry holds the text)
+TEXT_CACHE_SIZE = int(os.getenv("CRAWL_TEXT_CACHE_SIZE", "256"))
+
+
+def conditional_headers(etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers from a previous response's validators"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def sniff_encoding(content_type: str, body: bytes) -> Optional[str]:
+    """Charset from the Content-Type header, else from the document's own declaration"""
+    match = _CHARSET_RE.search(content_type)
+    if match:
+        return match.group(1).lower()
+    declared = EncodingDetector.find_declared_encoding(body, is_html=True)
+    return declared.lower() if declared else None
+
+
+def decode_html(content: bytes, encoding: Optional[str] = None) -> str:
+    """Decode a body once, trusting the declared charset and falling back to detection"""
+    if encoding:
+        try:
+            return content.decode(encoding, errors='replace')
+        except LookupError:
+            pass  # Unknown charset name
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return UnicodeDammit(content, is_html=True).unicode_markup or content.decode('utf-8', errors='replace')
+
+
+# Combined forms so each selector list costs one tree walk instead of one per entry
+UNWANTED_SELECTOR = ', '.join(UNWANTED_SELECTORS)
+MAIN_SELECTOR = ', '.join(MAIN_SELECTORS)
+_MAIN_SELECTOR_PATTERNS = [soupsieve.compile(selector) for selector in MAIN_SELECTORS]
+
+# Tags scanned by the paragraph-level fallback
+MEANINGFUL_TAGS = ['p', 'div', 'section', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+# Common non-content patterns, fused into one regex so each check is a single scan
+SKIP_PATTERNS = [
+    r'^\s*\d+\s*$',  # Just numbers
+    r'^[A-Z\s]{10,}$',  # All caps (likely navigation) - made more strict
+    r'^(Home|About|Contact|Menu|Login|Sign up|Subscribe|Search)(\s|$)',
+    r'Cookie|Privacy Policy|Terms of Service|All rights reserved',
+    r'^\d+\s+of\s+\d+$',  # Pagination
+    r'^Page\s+\d+$',
+    r'^©\s*\d{4}',
+    r'^Back to top$',
+    r'^Skip to main content$',
+]
+_SKIP_RE = re.compile('|'.join(f'(?:{p})' for p in SKIP_PATTERNS), re.IGNORECASE)
+
+# Technical content patterns (versions, metrics, tech names)
+TECHNICAL_PATTERNS = [
+    r'\b(python|javascript|java|react|node|django|mongodb|docker|kubernetes)\b',
+    r'\b\d+\.\d+(\.\d+)?\b',  # Version numbers
+    r'\b\d+%\b',  # Percentages
+    r'\b\d+x\b',  # Multipliers
+    r'\b(faster|slower|better|performance|compatible|supports|requires)\b',
+    r'\b(memory|cpu|storage|latency|throughput|index|query)\b',
+]
+_TECH_RE = re.compile('|'.join(f'(?:{p})' for p in TECHNICAL_PATTERNS), re.IGNORECASE)
+
 class ContentFetcher:
-    def __init__(self):
+    def __init__(self, per_domain_limit: int = 4, default_delay: float = 1.0):
         self.session = requests.Session()
+        # Larger keep-alive pool so repeat fetches across many domains reuse TCP/TLS
+        # connections; retries stay in fetch_url, so the adapter itself never retries
+        adapter = HTTPAdapter(
+            pool_connections=64,
+            pool_maxsize=64,
+            max_retries=Retry(total=0, backoff_factor=0)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 FreshLenseBot/1.0'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 FreshLenseBot/1.0',
+            'Connection': 'keep-alive',
+            # gzip/deflate, plus br/zstd when urllib3 can decode them
+            'Accept-Encoding': ACCEPT_ENCODING,
         })
-        self.domain_delays = {}  # Track last request time per domain
+        # Per-domain politeness: minimum spacing between requests (seconds), overridable
+        # per domain (e.g. from robots.txt Crawl-delay), paced on the monotonic clock
+        self.default_delay = default_delay
+        self.domain_delays: Dict[str, float] = {}
+        self._next_allowed: Dict[str, float] = {}  # Monotonic time of each domain's next free slot
+        self._slot_lock = threading.Lock()
+        
+        # Async client (created lazily) and per-domain concurrency caps for every async fetch
+        self.per_domain_limit = per_domain_limit
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._domain_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._text_cache = TTLCache(maxsize=TEXT_CACHE_SIZE, ttl=86400)  # url -> _CachedText
+
+    def set_domain_delay(self, domain: str, delay: float):
+        """Override the minimum spacing between requests to one domain"""
+        self.domain_delays[domain] = delay
+
+    def _reserve_slot(self, domain: str) -> float:
+        """
+        Claim the domain's next request slot (single-token bucket)
+        Returns: seconds the caller must wait before sending its request
+        """
+        now = time.monotonic()
+        delay = self.domain_delays.get(domain, self.default_delay)
+        with self._slot_lock:
+            slot = max(now, self._next_allowed.get(domain, now))
+            self._next_allowed[domain] = slot + delay
+        return slot - now
 
-    def fetch_url(self, url: str, max_retries: int = 3) -> Optional[str]:
+    def fetch_url(self, url: str, max_retries: int = 3,
+                  conditional_headers: Optional[Dict[str, str]] = None) -> Union[str, _Unchanged, None]:
         """Fetch HTML content from a URL with retries and error handling"""
+        page = self.fetch_raw(url, max_retries, conditional_headers)
+        if page is UNCHANGED:
+            return UNCHANGED
+        return page.text if page else None
+
+    def fetch_raw(self, url: str, max_retries: int = 3,
+                  conditional_headers: Optional[Dict[str, str]] = None) -> Union[FetchedPage, _Unchanged, None]:
+        """
+        Fetch the undecoded body so the parser can consume bytes directly
+        With conditional_headers, a 304 response returns UNCHANGED without a body
+        """
         if not url or not url.startswith(('http://', 'https://')):
             logger.error(f"Invalid URL format: {url}")
             return None
@@ -27,26 +247,39 @@ class ContentFetcher:
         domain = urlparse(url).netloc
         
         # Rate limiting per domain
-        if domain in self.domain_delays:
-            time_since_last = time.time() - self.domain_delays[domain]
-            if time_since_last < 1.0:
-                time.sleep(1.0 - time_since_last)
+        wait = self._reserve_slot(domain)
+        if wait > 0:
+            time.sleep(wait)
         
         for attempt in range(max_retries):
             try:
                 logger.debug(f"🌐 Fetching {url} (attempt {attempt + 1})")
-                response = self.session.get(url, timeout=15, allow_redirects=True)
-                response.raise_for_status()
-                
-                # Check content type
-                content_type = response.headers.get('content-type', '').lower()
-                if not any(ct in content_type for ct in ['text/html', 'text/plain', 'application/xhtml']):
-                    logger.warning(f"Unsupported content type: {content_type}")
-                    return None
+                with self.session.get(url, timeout=15, allow_redirects=True, stream=True,
+                                      headers=conditional_headers) as response:
+                    if response.status_code == 304:
+                        logger.debug(f"♻️ Not modified: {url}")
+                        return UNCHANGED
+                    response.raise_for_status()
+                    
+                    # Check content type before downloading the body
+                    content_type = response.headers.get('content-type', '').lower()
+                    if not any(ct in content_type for ct in SUPPORTED_CONTENT_TYPES):
+                        logger.warning(f"Unsupported content type: {content_type}")
+                        return None
+                    
+                    chunks = []
+                    total = 0
+                    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        chunks.append(chunk)
+                        total += len(chunk)
+                        if total >= MAX_CONTENT_BYTES:
+                            logger.warning(f"✂️ Truncating {url} at {MAX_CONTENT_BYTES} bytes")
+                            break
+                    body = b''.join(chunks)[:MAX_CONTENT_BYTES]
                 
-                self.domain_delays[domain] = time.time()
-                logger.debug(f"✅ Successfully fetched {url} ({len(response.text)} bytes)")
-                return response.text
+                logger.debug(f"✅ Successfully fetched {url} ({len(body)} bytes)")
+                return FetchedPage(body, sniff_encoding(content_type, body),
+                                   response.headers.get('etag'), response.headers.get('last-modified'))
                 
             except requests.exceptions.Timeout:
                 logger.warning(f"⏰ Timeout on attempt {attempt + 1} for {url}")
@@ -68,46 +301,167 @@ class ContentFetcher:
                 logger.error(f"💥 All attempts failed for {url}")
                 return None
 
-    def extract_main_content(self, html: str, url: str) -> str:
-        """Extract main content from HTML using BeautifulSoup"""
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Shared AsyncClient so concurrent fetches reuse pooled keep-alive connections"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                # Keep idle sockets for a minute (httpx default is 5s) so periodic crawls of
+                # the same hosts skip the DNS lookup and TCP/TLS handshake
+                limits=httpx.Limits(max_keepalive_connections=100, max_connections=200,
+                                    keepalive_expiry=60),
+                timeout=15,
+                follow_redirects=True,
+                headers={'User-Agent': self.session.headers['User-Agent']}
+            )
+        return self._async_client
+
+    async def fetch_url_async(self, url: str, max_retries: int = 3,
+                              conditional_headers: Optional[Dict[str, str]] = None) -> Union[str, _Unchanged, None]:
+        """Async counterpart of fetch_url for use on the event loop"""
+        page = await self.fetch_raw_async(url, max_retries, conditional_headers)
+        if page is UNCHANGED:
+            return UNCHANGED
+        return page.text if page else None
+
+    async def fetch_raw_async(self, url: str, max_retries: int = 3,
+                              conditional_headers: Optional[Dict[str, str]] = None) -> Union[FetchedPage, _Unchanged, None]:
+        """Async counterpart of fetch_raw"""
+        if not url or not url.startswith(('http://', 'https://')):
+            logger.error(f"Invalid URL format: {url}")
+            return None
+        
+        domain = urlparse(url).netloc
+        client = self._get_async_client()
+        
+        # Rate limiting per domain
+        wait = self._reserve_slot(domain)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        
+        for attempt in range(max_retries):
+            try:
+                logger.debug(f"🌐 Fetching {url} (attempt {attempt + 1})")
+                # The slot is held per attempt, not across the retry backoff
+                async with self._domain_semaphore(domain), \
+                        client.stream('GET', url, headers=conditional_headers) as response:
+                    if response.status_code == 304:
+                        logger.debug(f"♻️ Not modified: {url}")
+                        return UNCHANGED
+                    response.raise_for_status()
+                    
+                    # Check content type before downloading the body
+                    content_type = response.headers.get('content-type', '').lower()
+                    if not any(ct in content_type for ct in SUPPORTED_CONTENT_TYPES):
+                        logger.warning(f"Unsupported content type: {content_type}")
+                        return None
+                    
+                    chunks = []
+                    total = 0
+                    async for chunk in response.aiter_bytes(chunk_size=STREAM_CHUNK_SIZE):
+                        chunks.append(chunk)
+                        total += len(chunk)
+                        if total >= MAX_CONTENT_BYTES:
+                            logger.warning(f"✂️ Truncating {url} at {MAX_CONTENT_BYTES} bytes")
+                            break
+                    body = b''.join(chunks)[:MAX_CONTENT_BYTES]
+                
+                logger.debug(f"✅ Successfully fetched {url} ({len(body)} bytes)")
+                return FetchedPage(body, sniff_encoding(content_type, body),
+                                   response.headers.get('etag'), response.headers.get('last-modified'))
+                
+            except httpx.TimeoutException:
+                logger.warning(f"⏰ Timeout on attempt {attempt + 1} for {url}")
+            except httpx.TransportError:
+                logger.warning(f"🔌 Connection error on attempt {attempt + 1} for {url}")
+            except httpx.HTTPStatusError as e:
+                logger.warning(f"🚫 HTTP error on attempt {attempt + 1} for {url}: {e}")
+                if e.response.status_code in [404, 403, 401]:
+                    # Don't retry for client errors
+                    break
+            except httpx.HTTPError as e:
+                logger.warning(f"❌ Request failed on attempt {attempt + 1} for {url}: {e}")
+            
+            if attempt < max_retries - 1:
+                wait_time = 2 ** attempt
+                logger.debug(f"⏳ Waiting {wait_time} seconds before retry...")
+                await asyncio.sleep(wait_time)
+            else:
+                logger.error(f"💥 All attempts failed for {url}")
+                return None
+
+    def _domain_semaphore(self, domain: str) -> asyncio.Semaphore:
+        """
+        Cap on in-flight requests per domain (per_domain_limit), shared by every async
+        fetch: manual crawls, scheduler sweeps and fetch_many alike
+        """
+        semaphore = self._domain_semaphores.get(domain)
+        if semaphore is None:
+            semaphore = self._domain_semaphores[domain] = asyncio.Semaphore(self.per_domain_limit)
+        return semaphore
+
+    async def fetch_many(self, urls: List[str]) -> List[Optional[str]]:
+        """
+        Fetch many URLs concurrently on the event loop
+        Returns: HTML (or None) for each URL, in the same order as `urls`
+        """
+        results = await asyncio.gather(*[self.fetch_url_async(url) for url in urls], return_exceptions=True)
+        return [None if isinstance(result, BaseException) else result for result in results]
+
+    async def startup(self):
+        """Open the shared async client up front instead of on the first fetch"""
+        self._get_async_client()
+
+    async def aclose(self):
+        """Close the async client's pooled connections"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def extract_main_content(self, html: Union[str, bytes], url: str, encoding: Optional[str] = None) -> str:
+        """
+        Extract main content from HTML using BeautifulSoup
+        html may be raw bytes, with encoding as the charset hint from fetch_raw
+        """
         if not html or not html.strip():
             logger.warning("Empty HTML content provided")
             return ""
             
         logger.debug(f"🔍 Extracting content from {url}")
         
+        if LexborHTMLParser is not None:
+            try:
+                return self._extract_with_lexbor(self._lexbor_input(html, encoding), url)
+            except Exception as e:
+                # Malformed pages: retry with the more forgiving BeautifulSoup path
+                logger.debug(f"Lexbor extraction failed for {url}, falling back to BeautifulSoup: {e}")
+        
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove unwanted elements
-            unwanted_selectors = [
-                'script', 'style', 'nav', 'footer', 'header', 'aside', 
-                'form', 'iframe', '.advertisement', '.ad', '.ads',
-                '.social-share', '.share-buttons', '.comments',
-                '.cookie-banner', '.newsletter-signup', '.popup',
-                '[role="banner"]', '[role="navigation"]', '[role="contentinfo"]'
-            ]
-            
-            for selector in unwanted_selectors:
-                for element in soup.select(selector):
-                    element.decompose()
+            soup = self._parse(html, encoding)
+        except Exception as e:
+            logger.error(f"💥 Content extraction failed for {url}: {e}")
+            return ""
+        return self.extract_main_content_from_soup(soup, url)
+
+    def extract_main_content_from_soup(self, soup: BeautifulSoup, url: str) -> str:
+        """
+        BeautifulSoup extraction on an already parsed document
+        Note: strips boilerplate from the soup in place
+        """
+        try:
+            # Remove unwanted elements (innermost first, so nothing is decomposed twice)
+            for element in reversed(soup.select(UNWANTED_SELECTOR)):
+                element.decompose()
             
             # Remove comments
             for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
                 comment.extract()
             
-            # Try to find main content using semantic selectors
-            main_selectors = [
-                'main', 'article', '[role="main"]', 
-                '.content', '.main-content', '#content', '.page-content',
-                '.post', '.blog-post', '.entry-content', '.post-content',
-                '.documentation', '.docs-content', '.api-content',
-                '.technical-content', '.tutorial-content', '.wiki-content',
-                '.markdown-body', '.readme', '.doc-content'
-            ]
-            
-            for selector in main_selectors:
-                main_content = soup.select_one(selector)
+            # Try to find main content using semantic selectors: one walk collects
+            # every candidate in document order, then selectors are tried by priority
+            main_candidates = soup.select(MAIN_SELECTOR)
+            for selector, pattern in zip(MAIN_SELECTORS, _MAIN_SELECTOR_PATTERNS):
+                main_content = next((el for el in main_candidates if pattern.match(el)), None)
                 if main_content:
                     text = main_content.get_text(separator='\n', strip=True)
                     if len(text) > 100:  # Increased threshold for meaningful content
@@ -117,15 +471,18 @@ class ContentFetcher:
                             return cleaned_text
             
             # Fallback: Extract from meaningful paragraphs and divs
-            meaningful_elements = soup.find_all(['p', 'div', 'section', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+            meaningful_elements = soup.find_all(MEANINGFUL_TAGS)
             meaningful_text = []
             
             for elem in meaningful_elements:
+                # One walk over the subtree yields both the element count and the text
+                n_children, strings = self._count_tags_and_strings(elem)
+                
                 # Skip if element contains mostly child elements (likely navigation)
-                if len(elem.find_all()) > len(elem.get_text().split()) // 3:
+                if n_children > len(''.join(strings).split()) // 3:
                     continue
                     
-                text = elem.get_text(separator=' ', strip=True)
+                text = ' '.join(stripped for stripped in (s.strip() for s in strings) if stripped)
                 if self.is_meaningful_text(text):
                     meaningful_text.append(text)
             
@@ -151,6 +508,111 @@ class ContentFetcher:
             logger.error(f"💥 Content extraction failed for {url}: {e}")
             return ""
 
+    @staticmethod
+    def _count_tags_and_strings(elem: Tag) -> Tuple[int, List[str]]:
+        """Descendant tag count plus the strings get_text() would join, from a single walk"""
+        n_children = 0
+        strings = []
+        for node in elem.descendants:
+            if isinstance(node, Tag):
+                n_children += 1
+            elif type(node) is NavigableString:  # Same strings get_text() uses: no comments/scripts
+                strings.append(node)
+        return n_children, strings
+
+    def extract_content_and_metadata(self, html: Union[str, bytes], url: str,
+                                     encoding: Optional[str] = None) -> Tuple[str, dict]:
+        """
+        Main content and metadata from a single parse of the page
+        Returns: (content, metadata) tuple
+        """
+        if not html or not html.strip():
+            logger.warning("Empty HTML content provided")
+            return "", {}
+        
+        # Metadata is read first because extraction prunes the tree
+        if LexborHTMLParser is not None:
+            try:
+                tree = LexborHTMLParser(self._lexbor_input(html, encoding))
+                metadata = self._metadata_from_lexbor(tree)
+                return self._extract_from_lexbor_tree(tree, url), metadata
+            except Exception as e:
+                logger.debug(f"Lexbor extraction failed for {url}, falling back to BeautifulSoup: {e}")
+        
+        try:
+            soup = self._parse(html, encoding)
+        except Exception as e:
+            logger.error(f"💥 Content extraction failed for {url}: {e}")
+            return "", {}
+        metadata = self.get_content_metadata_from_soup(soup, url)
+        return self.extract_main_content_from_soup(soup, url), metadata
+
+    @staticmethod
+    def _parse(html: Union[str, bytes], encoding: Optional[str] = None) -> BeautifulSoup:
+        """Parse str or bytes; bytes go straight to the parser with the charset hint"""
+        if isinstance(html, bytes):
+            return BeautifulSoup(html, HTML_PARSER, from_encoding=encoding)
+        return BeautifulSoup(html, HTML_PARSER)
+
+    @staticmethod
+    def _lexbor_input(html: Union[str, bytes], encoding: Optional[str]) -> Union[str, bytes]:
+        """Lexbor reads bytes as UTF-8 only, so anything else is decoded first"""
+        if isinstance(html, bytes) and encoding not in ('utf-8', 'utf8'):
+            return decode_html(html, encoding)
+        return html
+
+    def _extract_with_lexbor(self, html: Union[str, bytes], url: str) -> str:
+        """Lexbor (selectolax) version of extract_main_content - same heuristics, C tree walks"""
+        return self._extract_from_lexbor_tree(LexborHTMLParser(html), url)
+
+    def _extract_from_lexbor_tree(self, tree, url: str) -> str:
+        """Extraction on an already parsed Lexbor tree (pruned in place)"""
+        # Remove unwanted elements (comments are skipped by Lexbor's text() already).
+        # Reverse document order destroys nested matches before their ancestors.
+        for node in reversed(tree.css(UNWANTED_SELECTOR)):
+            node.decompose()
+        
+        # Try to find main content using semantic selectors; a single combined
+        # query first tells us whether probing them one by one is worth it
+        has_main_candidates = bool(tree.css_first(MAIN_SELECTOR))
+        for selector in (MAIN_SELECTORS if has_main_candidates else ()):
+            main_content = tree.css_first(selector)
+            if main_content:
+                text = main_content.text(separator='\n', strip=True)
+                if len(text) > 100:
+                    logger.debug(f"✅ Found content with selector '{selector}': {len(text)} characters")
+                    cleaned_text = self.clean_text(text)
+                    if len(cleaned_text) > 50:
+                        return cleaned_text
+        
+        # Fallback: Extract from meaningful paragraphs and divs
+        meaningful_text = []
+        for elem in tree.css(', '.join(MEANINGFUL_TAGS)):
+            # Skip if element contains mostly child elements (likely navigation)
+            if len(elem.css('*')) > len(elem.text().split()) // 3:
+                continue
+            
+            text = elem.text(separator=' ', strip=True)
+            if self.is_meaningful_text(text):
+                meaningful_text.append(text)
+        
+        if meaningful_text:
+            combined_text = '\n'.join(meaningful_text)
+            logger.debug(f"✅ Found {len(meaningful_text)} meaningful elements: {len(combined_text)} characters")
+            cleaned = self.clean_text(combined_text)
+            if len(cleaned) > 50:
+                return cleaned
+        
+        # Final fallback: get all text
+        root = tree.root
+        cleaned_text = self.clean_text(root.text(separator='\n', strip=True) if root else "")
+        if len(cleaned_text) > 50:
+            logger.debug(f"✅ Final fallback extraction: {len(cleaned_text)} characters")
+            return cleaned_text
+        
+        logger.warning("No substantial content found")
+        return ""
+
     def is_meaningful_text(self, text: str) -> bool:
         """Check if text is meaningful (not navigation, ads, etc.) - MORE LENIENT FOR DOCS"""
         # 🚨 CRITICAL FIX: Reduced thresholds for technical documentation
@@ -162,34 +624,12 @@ class ContentFetcher:
             return False
         
         # Skip common non-content patterns
-        skip_patterns = [
-            r'^\s*\d+\s*$',  # Just numbers
-            r'^[A-Z\s]{10,}$',  # All caps (likely navigation) - made more strict
-            r'^(Home|About|Contact|Menu|Login|Sign up|Subscribe|Search)(\s|$)',
-            r'Cookie|Privacy Policy|Terms of Service|All rights reserved',
-            r'^\d+\s+of\s+\d+$',  # Pagination
-            r'^Page\s+\d+$',
-            r'^©\s*\d{4}',
-            r'^Back to top$',
-            r'^Skip to main content$',
-        ]
-        
-        for pattern in skip_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return False
+        if _SKIP_RE.search(text):
+            return False
         
         # 🚨 NEW: Explicitly allow technical content patterns
-        technical_patterns = [
-            r'\b(python|javascript|java|react|node|django|mongodb|docker|kubernetes)\b',
-            r'\b\d+\.\d+(\.\d+)?\b',  # Version numbers
-            r'\b\d+%\b',  # Percentages
-            r'\b\d+x\b',  # Multipliers
-            r'\b(faster|slower|better|performance|compatible|supports|requires)\b',
-            r'\b(memory|cpu|storage|latency|throughput|index|query)\b',
-        ]
-        
-        # If it matches technical patterns, be more lenient
-        if any(re.search(pattern, text, re.IGNORECASE) for pattern in technical_patterns):
+        # If it matches technical patterns, be more lenient (only logged, so skip the scan otherwise)
+        if logger.isEnabledFor(logging.DEBUG) and _TECH_RE.search(text):
             logger.debug(f"🔧 Allowing technical content: '{text}'")
             return True
         
@@ -201,9 +641,9 @@ class ContentFetcher:
             return ""
         
         lines = []
-        seen_lines = set()  # Remove duplicates
+        seen = set()  # 64-bit hashes of kept lines, to remove duplicates
         
-        for line in text.split('\n'):
+        for line in text.split('\n'):  # strip() below also drops a CRLF's \r
             line = line.strip()
             
             # Skip empty lines
@@ -215,18 +655,19 @@ class ContentFetcher:
                 continue
             
             # Skip duplicate lines
-            if line in seen_lines:
+            line_hash = xxhash.xxh64_intdigest(line)
+            if line_hash in seen:
                 continue
             
             # Check if line is meaningful (with new lenient rules)
             if self.is_meaningful_text(line):
                 lines.append(line)
-                seen_lines.add(line)
+                seen.add(line_hash)
         
         # Join lines and clean up extra whitespace
         result = '\n'.join(lines)
-        result = re.sub(r'\n{3,}', '\n\n', result)  # Max 2 consecutive newlines
-        result = re.sub(r' {2,}', ' ', result)  # Remove extra spaces
+        result = _NEWLINE_RUN.sub('\n\n', result)  # Max 2 consecutive newlines
+        result = _SPACE_RUN.sub(' ', result)  # Remove extra spaces
         
         logger.debug(f"📝 Cleaned text length: {len(result)} characters")
         if result:
@@ -241,20 +682,90 @@ class ContentFetcher:
         except Exception:
             return "unknown"
 
-    def fetch_and_extract(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+    def fetch_and_extract(self, url: str,
+                          conditional_headers: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], Optional[str]]:
         """
         Fetch and extract content in one call
-        Returns: (html, content) tuple
+        Returns: (html, content) tuple, or (UNCHANGED, UNCHANGED) on 304 Not Modified
         """
-        try:
-            html = self.fetch_url(url)
-            if html:
-                content = self.extract_main_content(html, url)
-                return html, content
+        result = self.fetch_and_extract_page(url, conditional_headers)
+        if result is UNCHANGED:
+            return UNCHANGED, UNCHANGED
+        if result is None:
             return None, None
+        page, content = result
+        return page.text, content
+
+    def fetch_and_extract_page(self, url: str, conditional_headers: Optional[Dict[str, str]] = None,
+                               known_hash: Optional[str] = None) -> Union[Tuple[FetchedPage, str], _Unchanged, None]:
+        """
+        Like fetch_and_extract, but keeps the FetchedPage (raw bytes and validators)
+        Returns: (page, content) tuple, or UNCHANGED on 304 or when the body's
+        content_hash equals known_hash, or None on failure
+        """
+        try:
+            page = self.fetch_raw(url, conditional_headers=conditional_headers)
+            if page is UNCHANGED or (page and known_hash and page.content_hash == known_hash):
+                return UNCHANGED
+            if page and page.content:
+                content = self.extract_main_content(page.content, url, encoding=page.encoding)
+                return page, content
+            return None
         except Exception as e:
             logger.error(f"💥 fetch_and_extract failed for {url}: {e}")
+            return None
+
+    async def extract_main_content_async(self, html: Union[str, bytes], url: str,
+                                         encoding: Optional[str] = None) -> str:
+        """extract_main_content on the shared process pool, keeping the event loop free"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_extract_pool(), _extract_worker, html, url, encoding)
+
+    async def fetch_and_extract_async(self, url: str, conditional_headers: Optional[Dict[str, str]] = None
+                                      ) -> Tuple[Optional[str], Optional[str]]:
+        """Async fetch_and_extract: pooled httpx fetch on the loop, parse in the process pool"""
+        result = await self.fetch_and_extract_page_async(url, conditional_headers)
+        if result is UNCHANGED:
+            return UNCHANGED, UNCHANGED
+        if result is None:
             return None, None
+        page, content = result
+        return page.text, content
+
+    async def fetch_and_extract_page_async(self, url: str, conditional_headers: Optional[Dict[str, str]] = None,
+                                           known_hash: Optional[str] = None
+                                           ) -> Union[Tuple[FetchedPage, str], _Unchanged, None]:
+        """Async counterpart of fetch_and_extract_page: fetch on the loop, parse in the process pool"""
+        try:
+            page = await self.fetch_raw_async(url, conditional_headers=conditional_headers)
+            if page is UNCHANGED or (page and known_hash and page.content_hash == known_hash):
+                return UNCHANGED
+            if page and page.content:
+                content = await self.extract_main_content_async(page.content, url, encoding=page.encoding)
+                return page, content
+            return None
+        except Exception as e:
+            logger.error(f"💥 fetch_and_extract failed for {url}: {e}")
+            return None
+
+    async def fetch_text_cached_async(self, url: str, force: bool = False) -> Optional[str]:
+        """
+        Extracted text of url, revalidated against the previous fetch: a 304, or a body
+        with the same hash, returns the cached text without parsing. force skips the cache
+        Returns None on failure
+        """
+        cached = None if force else self._text_cache.get(url)
+        headers = conditional_headers(cached.etag, cached.last_modified) if cached else None
+        result = await self.fetch_and_extract_page_async(
+            url, headers, known_hash=cached.content_hash if cached else None
+        )
+        if result is UNCHANGED:
+            return cached.text if cached else None
+        if result is None:
+            return None
+        page, content = result
+        self._text_cache[url] = _CachedText(page.etag, page.last_modified, page.content_hash, content)
+        return content
 
     def validate_url(self, url: str) -> bool:
         """Validate if URL is properly formatted and accessible"""
@@ -270,13 +781,21 @@ class ContentFetcher:
         except Exception:
             return False
 
-    def get_content_metadata(self, html: str, url: str) -> dict:
+    def get_content_metadata(self, html: Union[str, bytes], url: str, encoding: Optional[str] = None) -> dict:
         """Extract metadata about the content"""
         if not html:
             return {}
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = self._parse(html, encoding)
+        except Exception as e:
+            logger.error(f"Metadata extraction error for {url}: {e}")
+            return {}
+        return self.get_content_metadata_from_soup(soup, url)
+
+    def get_content_metadata_from_soup(self, soup: BeautifulSoup, url: str) -> dict:
+        """Metadata from an already parsed document"""
+        try:
             metadata = {
                 'title': '',
                 'description': '',
@@ -302,4 +821,64 @@ class ContentFetcher:
             return metadata
         except Exception as e:
             logger.error(f"Metadata extraction error for {url}: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+    @staticmethod
+    def _metadata_from_lexbor(tree) -> dict:
+        """Lexbor version of get_content_metadata_from_soup"""
+        metadata = {
+            'title': '',
+            'description': '',
+            'language': '',
+            'last_modified': None
+        }
+        
+        title_tag = tree.css_first('title')
+        if title_tag:
+            metadata['title'] = title_tag.text().strip()
+        
+        desc_tag = tree.css_first('meta[name="description"]')
+        if desc_tag:
+            metadata['description'] = (desc_tag.attributes.get('content') or '').strip()
+        
+        html_tag = tree.css_first('html')
+        if html_tag:
+            metadata['language'] = (html_tag.attributes.get('lang') or '').strip()
+        
+        return metadata
+
+
+# ---------------- Process pool for CPU-bound extraction ----------------
+# Parsing holds the GIL, so sweeps over many pages spread it across processes.
+# Created lazily on first use; the app shuts it down on exit.
+_EXTRACT_POOL: Optional[ProcessPoolExecutor] = None
+_EXTRACT_POOL_LOCK = threading.Lock()
+_worker_fetcher: Optional[ContentFetcher] = None  # One per worker process
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    global _EXTRACT_POOL
+    with _EXTRACT_POOL_LOCK:
+        if _EXTRACT_POOL is None:
+            # spawn: forking a process that runs threads and an event loop is unsafe
+            _EXTRACT_POOL = ProcessPoolExecutor(
+                max_workers=int(os.getenv("EXTRACT_POOL_WORKERS", "0")) or os.cpu_count(),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _EXTRACT_POOL
+
+
+def shutdown_extract_pool():
+    global _EXTRACT_POOL
+    with _EXTRACT_POOL_LOCK:
+        if _EXTRACT_POOL is not None:
+            _EXTRACT_POOL.shutdown(wait=True, cancel_futures=True)
+            _EXTRACT_POOL = None
+
+
+def _extract_worker(html: Union[str, bytes], url: str, encoding: Optional[str] = None) -> str:
+    """Runs inside a pool process"""
+    global _worker_fetcher
+    if _worker_fetcher is None:
+        _worker_fetcher = ContentFetcher()
+    return _worker_fetcher.extract_main_content(html, url, encoding)
@@ -1,53 +1,137 @@
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import DuplicateKeyError, ConnectionFailure, ServerSelectionTimeoutError
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ConnectionFailure, OperationFailure, PyMongoError, ServerSelectionTimeoutError
 from datetime import datetime
+import hashlib
 import os
+import time
 from bson import ObjectId
-from passlib.context import CryptContext
+import bcrypt
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import zstandard as zstd
+from cachetools import TTLCache
+
+# Password hashing: the bcrypt C binding directly (cost factor is tunable per deployment).
+# Each +1 doubles the work per login/register (2^rounds iterations): pick the highest
+# value that keeps one hash around 50-250 ms on the production CPU - the startup log
+# prints the measured time (hash_cost_ms). The old passlib default of 12 is ~4x the cost of 10.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "10"))
+# Hashes hash_password produces today; anything else (e.g. older, costlier hashes)
+# gets re-hashed at the next login
+_CURRENT_HASH_PREFIX = f"$2b${BCRYPT_ROUNDS:02d}$"
+
+
+def hash_password(plain_password: str) -> str:
+    """bcrypt hash ($2b$, BCRYPT_ROUNDS); bcrypt only uses the first 72 bytes of the password"""
+    return bcrypt.hashpw(plain_password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+# MongoDB connection (motor: every helper below is awaited on the event loop)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+# Explicit pool (per process - each gunicorn worker has its own): a warm baseline so
+# bursts don't open connections from scratch, idle ones recycled after 5 minutes, and
+# requests fail after 5s waiting for a connection instead of piling up.
+# Wire compression: zstd (zstandard is already a dependency), zlib as the fallback
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "200")),
+    minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "10")),
+    maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    waitQueueTimeoutMS=5000,
+    retryWrites=True,
+    compressors="zstd,zlib",
+)  # Connects lazily; init_db() verifies it at startup
+db = client['freshlense']
+
+# Collections
+users_collection = db['users']
+pages_collection = db['tracked_pages']
+versions_collection = db['page_versions']
+changes_collection = db['change_logs']
+password_reset_tokens_collection = db['password_reset_tokens']  # ✅ ADDED: New collection
+
+
+# Indexes, declared per collection: each list goes out as one createIndexes command
+# and the collections are done concurrently (startup is one round trip, not eleven)
+INDEXES = {
+    users_collection: [IndexModel([("email", ASCENDING)], unique=True)],
+    pages_collection: [
+        IndexModel([("user_id", ASCENDING), ("url", ASCENDING)], unique=True),
+        # user_id prefix serves lookups/counts; created_at serves the dashboard list sort
+        IndexModel([("user_id", ASCENDING), ("is_active", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("is_active", ASCENDING), ("last_checked", ASCENDING)]),
+    ],
+    versions_collection: [IndexModel([("page_id", ASCENDING), ("timestamp", DESCENDING)])],
+    changes_collection: [
+        IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("page_id", ASCENDING), ("timestamp", DESCENDING)]),
+    ],
+    # ✅ ADDED: Indexes for password reset tokens
+    password_reset_tokens_collection: [
+        IndexModel([("token_hash", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),  # TTL index
+    ],
+}
+
+
+async def create_indexes():
+    # Reset tokens are stored hashed now; the old plaintext index would reject every
+    # new (token-less) document as a second null
+    try:
+        await password_reset_tokens_collection.drop_index("token_1")
+    except OperationFailure:
+        pass  # Already gone
+    # Plaintext-only tokens can't be looked up any more, and several of them would all
+    # index as token_hash: null and fail the unique build below
+    await password_reset_tokens_collection.delete_many({"token_hash": {"$exists": False}})
+    await asyncio.gather(*(collection.create_indexes(models) for collection, models in INDEXES.items()))
+    print("✅ Database indexes created successfully!")
+
+
+async def init_db() -> bool:
+    """Test the connection and create indexes - called once from the app lifespan"""
+    global db
+    try:
+        await client.admin.command('ping')  # Test the connection
+        print("✅ MongoDB connection successful!")
+    except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+        print(f"❌ MongoDB connection failed: {e}")
+        db = None
+        return False
+    try:
+        await create_indexes()
+    except PyMongoError as e:  # e.g. DuplicateKeyError building a unique index over old data
+        # The connection is fine: serve without the missing index rather than not start
+        print(f"⚠️ Index creation failed: {e}")
+    return True
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# MongoDB connection
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = None
-db = None
-
-try:
-    client = MongoClient(MONGO_URI)
-    client.admin.command('ping')  # Test the connection
-    print("✅ MongoDB connection successful!")
-    db = client['freshlense']
-
-    # Collections
-    users_collection = db['users']
-    pages_collection = db['tracked_pages']
-    versions_collection = db['page_versions']
-    changes_collection = db['change_logs']
-    password_reset_tokens_collection = db['password_reset_tokens']  # ✅ ADDED: New collection
-
-    # Indexes
-    def create_indexes():
-        users_collection.create_index([("email", ASCENDING)], unique=True)
-        pages_collection.create_index([("user_id", ASCENDING), ("url", ASCENDING)], unique=True)
-        pages_collection.create_index([("user_id", ASCENDING), ("is_active", ASCENDING)])
-        versions_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
-        changes_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        changes_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
-        
-        # ✅ ADDED: Indexes for password reset tokens
-        password_reset_tokens_collection.create_index([("token", ASCENDING)], unique=True)
-        password_reset_tokens_collection.create_index([("user_id", ASCENDING)])
-        password_reset_tokens_collection.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)  # TTL index
-        
-        print("✅ Database indexes created successfully!")
+def close_db():
+    """Close the motor client's connection pool - called once from the app lifespan"""
+    client.close()
+
 
-    create_indexes()
+# bcrypt gets its own pool: concurrent logins are capped at one hash per core and
+# don't queue behind (or starve) whatever else uses the default executor
+_HASH_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="bcrypt")
 
-except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    client = None
-    db = None
+
+def _time_one_hash() -> float:
+    start = time.perf_counter()
+    hash_password("benchmark")
+    return (time.perf_counter() - start) * 1000
+
+
+async def hash_cost_ms() -> float:
+    """Milliseconds for one password hash at BCRYPT_ROUNDS, measured on the hashing pool"""
+    return await _run_blocking(_time_one_hash)
+
+
+async def _run_blocking(func, *args):
+    """Run CPU-bound work (bcrypt) on the hashing pool, off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(_HASH_EXECUTOR, func, *args)
 
 
 # ---------------- Helper ----------------
@@ -56,32 +140,74 @@ def is_db_available():
 
 
 def doc_to_dict(doc):
-    """Convert MongoDB ObjectIds -> str recursively"""
+    """Convert MongoDB ObjectIds -> str throughout a document, in place"""
     if doc is None:
         return None
     if "_id" in doc:
         doc["_id"] = str(doc["_id"])
-    for key, value in list(doc.items()):
-        if isinstance(value, ObjectId):
-            doc[key] = str(value)
-        elif isinstance(value, dict):
-            doc[key] = doc_to_dict(value)
-        elif isinstance(value, list):
-            doc[key] = [doc_to_dict(v) if isinstance(v, dict) else str(v) if isinstance(v, ObjectId) else v for v in value]
+    # Iterative walk: no recursion limit on deep docs, one isinstance chain per value
+    stack = [doc]
+    while stack:
+        node = stack.pop()
+        items = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, value in items:
+            if isinstance(value, ObjectId):
+                node[key] = str(value)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
     return doc
 
 
+async def _find_sorted(collection, query: dict, sort_field: str, limit: int = None, fields: dict = None) -> list:
+    """
+    Newest-first find run as an aggregation, so fields may reshape documents with
+    expressions ($toString, $ifNull) as well as act as a plain projection
+    """
+    pipeline = [{"$match": query}, {"$sort": {sort_field: DESCENDING}}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    if fields:
+        pipeline.append({"$project": fields})
+    return await collection.aggregate(pipeline).to_list(length=limit)
+
+
 # ---------------- User ----------------
-def get_user_by_email(email: str):
+async def get_user_by_email(email: str):
     """Get user by email address"""
     if db is None:
         return None
-    user = users_collection.find_one({"email": email})
+    user = await users_collection.find_one({"email": email})
     return user  # Return raw doc (main.py expects ObjectId format)
 
 
+# Short-lived email -> user doc cache for the auth dependency, which runs on every request
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+_user_cache = TTLCache(maxsize=4096, ttl=USER_CACHE_TTL)
+# Route handlers never need the hash, so it isn't kept in memory for every active user
+CACHED_USER_PROJECTION = {"hashed_password": 0}
+
+
+async def get_cached_user_by_email(email: str):
+    """User doc (minus the password hash) behind a TTL cache; misses are not cached"""
+    user = _user_cache.get(email)
+    if user is None:
+        if db is None:
+            return None
+        user = await users_collection.find_one({"email": email}, CACHED_USER_PROJECTION)
+        if user:
+            _user_cache[email] = user
+    return user
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Drop a user's cached doc, e.g. after the password changes"""
+    for email, user in list(_user_cache.items()):
+        if user.get("_id") == user_id:
+            _user_cache.pop(email, None)
+
+
 # ✅ ADDED: CRITICAL FUNCTION FOR SCHEDULER EMAILS
-def get_user_by_id(user_id):
+async def get_user_by_id(user_id):
     """Get user by ID"""
     if db is None:
         return None
@@ -89,42 +215,76 @@ def get_user_by_id(user_id):
         # Handle both ObjectId and string user_id
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
-        user = users_collection.find_one({"_id": user_id})
+        user = await users_collection.find_one({"_id": user_id})
         return user
     except Exception as e:
         print(f"Error getting user by ID: {e}")
         return None
 
 
-def create_user(user_data: dict):
+async def create_user(user_data: dict):
     """Create a new user with hashed password"""
     if db is None:
         return None
-    hashed_password = pwd_context.hash(user_data['password'])
+    hashed_password = await _run_blocking(hash_password, user_data['password'])
     user_doc = {
         "email": user_data['email'],
         "hashed_password": hashed_password,
         "created_at": datetime.utcnow(),
+        "page_seq": 0,  # Counter behind next_page_number
         "notification_preferences": {
             "email_alerts": True,
             "frequency": "immediately"
         }
     }
     try:
-        result = users_collection.insert_one(user_doc)
+        result = await users_collection.insert_one(user_doc)
         user_doc["_id"] = result.inserted_id
-        return user_doc  # Return with ObjectId for main.py normalize_doc
+        _user_cache.pop(user_doc["email"], None)
+        return user_doc  # Raw doc: main.py's response models read _id/ObjectIds directly
     except DuplicateKeyError:
         return None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:  # Malformed or non-bcrypt hash
+        return False
+
+
+def _verify_and_rehash(plain_password: str, hashed_password: str):
+    """(valid, new hash or None): verify, and re-hash if the stored hash is outdated"""
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if hashed_password.startswith(_CURRENT_HASH_PREFIX):
+        return True, None
+    return True, hash_password(plain_password)
+
+
+async def verify_and_update_password(user: dict, plain_password: str) -> bool:
+    """Verify off the event loop; re-hash and store the password if its hash is outdated"""
+    valid, new_hash = await _run_blocking(_verify_and_rehash, plain_password, user["hashed_password"])
+    if valid and new_hash and db is not None:
+        try:
+            await users_collection.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+            invalidate_cached_user(user["_id"])
+        except Exception as e:
+            print(f"❌ Error re-hashing password: {e}")
+    return valid
 
 
 # ---------------- Password Reset Token Operations ----------------
-def create_password_reset_token(token: str, user_id: ObjectId, expires_at: datetime) -> bool:
+def _reset_token_hash(token: str) -> bytes:
+    """
+    SHA-256 of a reset token: only this is stored, so a database dump yields no usable
+    links, and lookups hit a fixed 32-byte index key (the token is already 256 random bits)
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+
+async def create_password_reset_token(token: str, user_id: ObjectId, expires_at: datetime) -> bool:
     """Create a new password reset token"""
     if db is None:
         return False
@@ -137,7 +297,7 @@ def create_password_reset_token(token: str, user_id: ObjectId, expires_at: datet
             return False
     
     token_doc = {
-        "token": token,
+        "token_hash": _reset_token_hash(token),
         "user_id": user_id,
         "created_at": datetime.utcnow(),
         "expires_at": expires_at,
@@ -146,7 +306,7 @@ def create_password_reset_token(token: str, user_id: ObjectId, expires_at: datet
     }
     
     try:
-        result = password_reset_tokens_collection.insert_one(token_doc)
+        result = await password_reset_tokens_collection.insert_one(token_doc)
         return result.inserted_id is not None
     except DuplicateKeyError:
         # Token already exists (should be very rare with secure tokens)
@@ -156,14 +316,14 @@ def create_password_reset_token(token: str, user_id: ObjectId, expires_at: datet
         return False
 
 
-def get_valid_password_reset_token(token: str):
+async def get_valid_password_reset_token(token: str):
     """Get a valid, unused password reset token"""
     if db is None:
         return None
     
     try:
-        token_record = password_reset_tokens_collection.find_one({
-            "token": token,
+        token_record = await password_reset_tokens_collection.find_one({
+            "token_hash": _reset_token_hash(token),
             "used": False,
             "expires_at": {"$gt": datetime.utcnow()}  # Not expired
         })
@@ -173,14 +333,14 @@ def get_valid_password_reset_token(token: str):
         return None
 
 
-def mark_password_reset_token_used(token: str) -> bool:
+async def mark_password_reset_token_used(token: str) -> bool:
     """Mark a password reset token as used"""
     if db is None:
         return False
     
     try:
-        result = password_reset_tokens_collection.update_one(
-            {"token": token},
+        result = await password_reset_tokens_collection.update_one(
+            {"token_hash": _reset_token_hash(token)},
             {
                 "$set": {
                     "used": True,
@@ -194,7 +354,7 @@ def mark_password_reset_token_used(token: str) -> bool:
         return False
 
 
-def update_user_password(user_id: ObjectId, new_password: str) -> bool:
+async def update_user_password(user_id: ObjectId, new_password: str) -> bool:
     """Update a user's password"""
     if db is None:
         return False
@@ -206,10 +366,10 @@ def update_user_password(user_id: ObjectId, new_password: str) -> bool:
         except:
             return False
     
-    hashed_password = pwd_context.hash(new_password)
+    hashed_password = await _run_blocking(hash_password, new_password)
     
     try:
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": user_id},
             {
                 "$set": {
@@ -218,6 +378,7 @@ def update_user_password(user_id: ObjectId, new_password: str) -> bool:
                 }
             }
         )
+        invalidate_cached_user(user_id)
         return result.modified_count > 0
     except Exception as e:
         print(f"Error updating user password: {e}")
@@ -225,8 +386,8 @@ def update_user_password(user_id: ObjectId, new_password: str) -> bool:
 
 
 # ---------------- Tracked Pages ----------------
-def get_tracked_pages(user_id, active_only: bool = True):
-    """Get all tracked pages for a user"""
+async def get_tracked_pages(user_id, active_only: bool = True, fields: dict = None):
+    """Get all tracked pages for a user (fields: optional projection)"""
     if db is None:
         return []
     
@@ -237,78 +398,121 @@ def get_tracked_pages(user_id, active_only: bool = True):
     query = {"user_id": user_id}
     if active_only:
         query["is_active"] = True
-    pages = pages_collection.find(query).sort("created_at", DESCENDING)
-    return list(pages)  # Return raw docs for main.py normalize_doc
+    return await _find_sorted(pages_collection, query, "created_at", fields=fields)  # Raw docs unless fields reshapes them
 
 
-def get_tracked_page(page_id: str):
-    """Get a single tracked page by ID"""
+async def get_tracked_page(page_id: str, fields: dict = None):
+    """Get a single tracked page by ID (`fields` is an optional projection)"""
     if db is None:
         return None
     try:
-        page = pages_collection.find_one({"_id": ObjectId(page_id)})
+        page = await pages_collection.find_one({"_id": ObjectId(page_id)}, fields)
         return page  # Return raw doc
     except:
         return None
 
-
-def create_tracked_page(page_data: dict, user_id):
-    """Create a new tracked page"""
+async def get_tracked_page_for_user(page_id, user_id, fields: dict = None):
+    """Get a tracked page only if user_id owns it - ownership is checked in the _id lookup"""
     if db is None:
         return None
+    try:
+        return await pages_collection.find_one({"_id": ObjectId(page_id), "user_id": user_id}, fields)
+    except:
+        return None
+
+
+async def create_tracked_page(page_data: dict, user_id):
+    """Create a new tracked page (None if the user already tracks the URL)"""
+    page_doc, created = await upsert_tracked_page(page_data, user_id)
+    return page_doc if created else None
+
+
+async def upsert_tracked_page(page_data: dict, user_id):
+    """
+    Insert a tracked page unless the user already tracks its URL, in one atomic
+    upsert on the unique (user_id, url) index
+    Returns: (page_doc, created) - the existing page with created=False on a repeat
+    """
+    if db is None:
+        return None, False
     
     # Handle both ObjectId and string user_id
     if isinstance(user_id, str):
         user_id = ObjectId(user_id)
     
+    key = {"user_id": user_id, "url": page_data["url"]}
     page_doc = {
-        "user_id": user_id,
-        "url": page_data["url"],
         "display_name": page_data.get("display_name") or page_data["url"],
         "check_interval_minutes": page_data.get("check_interval_minutes", 1440),
         "is_active": True,
         "created_at": datetime.utcnow(),
         "last_checked": None,
+        "etag": None,  # HTTP validators from the last fetch, for conditional requests
+        "last_modified": None,
+        "content_hash": None,  # xxh64 of the last stored body
         "last_change_detected": None,
         "current_version_id": None,
     }
     try:
-        result = pages_collection.insert_one(page_doc)
-        page_doc["_id"] = result.inserted_id
-        return page_doc  # Return raw doc for main.py normalize_doc
+        result = await pages_collection.update_one(key, {"$setOnInsert": page_doc}, upsert=True)
     except DuplicateKeyError:
-        return None
+        result = None  # Raced a concurrent upsert of the same URL, which inserted it
+    if result is not None and result.upserted_id is not None:
+        # Raw doc: main.py's response models read _id/ObjectIds directly
+        return {"_id": result.upserted_id, **key, **page_doc}, True
+    return await pages_collection.find_one(key), False
 
 
-def update_tracked_page(page_id: str, update_data: dict) -> bool:
+async def update_tracked_page(page_id: str, update_data: dict) -> bool:
     """Update a tracked page"""
     if db is None:
         return False
     
-    # Handle ObjectId conversion for current_version_id
+    try:
+        result = await pages_collection.update_one({"_id": ObjectId(page_id)}, {"$set": _tracked_page_update(update_data)})
+        return result.modified_count > 0
+    except:
+        return False
+
+
+def _tracked_page_update(update_data: dict) -> dict:
+    """Copy of update_data with current_version_id as an ObjectId"""
     update_data_copy = update_data.copy()
     if "current_version_id" in update_data_copy and isinstance(update_data_copy["current_version_id"], str):
         update_data_copy["current_version_id"] = ObjectId(update_data_copy["current_version_id"])
+    return update_data_copy
+
+
+async def bulk_update_tracked_pages(updates: list) -> int:
+    """Apply (page_id, update_data) pairs with one unordered bulk_write; returns the modified count"""
+    if db is None or not updates:
+        return 0
     
+    ops = [UpdateOne({"_id": ObjectId(page_id)}, {"$set": _tracked_page_update(update_data)})
+           for page_id, update_data in updates]
     try:
-        result = pages_collection.update_one({"_id": ObjectId(page_id)}, {"$set": update_data_copy})
-        return result.modified_count > 0
+        return (await pages_collection.bulk_write(ops, ordered=False)).modified_count
+    except BulkWriteError as e:
+        return e.details.get("nModified", 0)
     except:
-        return False
+        return 0
 
 
-def delete_tracked_page(page_id: str) -> bool:
-    """Delete a tracked page by ID"""
+async def delete_tracked_page(page_id: str, user_id=None) -> bool:
+    """Delete a tracked page by ID (only if user_id owns it, when given)"""
     if db is None:
         return False
+    query = {"_id": ObjectId(page_id)}
+    if user_id is not None:
+        query["user_id"] = user_id
     try:
-        result = pages_collection.delete_one({"_id": ObjectId(page_id)})
+        result = await pages_collection.delete_one(query)
         return result.deleted_count > 0
     except:
         return False
 
 
-def get_tracked_page_by_url(url: str, user_id):
+async def get_tracked_page_by_url(url: str, user_id):
     """Find a tracked page by its URL for a specific user."""
     if db is None:
         return None
@@ -321,15 +525,15 @@ def get_tracked_page_by_url(url: str, user_id):
             return None  # Invalid string ID
 
     try:
-        # Return raw doc for main.py normalize_doc
-        return pages_collection.find_one({"url": url, "user_id": user_id})
+        # Raw doc: main.py's response models read _id/ObjectIds directly
+        return await pages_collection.find_one({"url": url, "user_id": user_id})
     except Exception as e:
         print(f"Error finding page by URL: {e}")
         return None
 
 
 # --- ✅ ADDED: get_user_page_count function ---
-def get_user_page_count(user_id: str) -> int:
+async def get_user_page_count(user_id: str) -> int:
     """Count how many pages a user currently has"""
     if db is None:
         return 0
@@ -339,7 +543,7 @@ def get_user_page_count(user_id: str) -> int:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
         
-        count = pages_collection.count_documents({"user_id": user_id})
+        count = await pages_collection.count_documents({"user_id": user_id})
         return count
     except Exception as e:
         print(f"Error counting user pages: {e}")
@@ -347,51 +551,206 @@ def get_user_page_count(user_id: str) -> int:
 # --- END OF ADDED FUNCTION ---
 
 
-# ---------------- Page Versions ----------------
-# ✅ UPDATED: Made html_content optional to match scheduler usage
-def create_page_version(page_id: str, text_content: str, url: str, html_content: str = None):
-    """Create a new page version with both HTML and text content"""
+async def next_page_number(user_id) -> int:
+    """Atomically bump and return the user's page counter (indexed $inc, no count scan)"""
     if db is None:
+        return 1
+
+    try:
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+
+        doc = await users_collection.find_one_and_update(
+            {"_id": user_id, "page_seq": {"$exists": True}},
+            {"$inc": {"page_seq": 1}},
+            projection={"page_seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            # Accounts created before the counter: seed it once from the page count.
+            # The $exists filter keeps concurrent seeders from resetting each other.
+            await users_collection.update_one(
+                {"_id": user_id, "page_seq": {"$exists": False}},
+                {"$set": {"page_seq": await get_user_page_count(user_id)}},
+            )
+            doc = await users_collection.find_one_and_update(
+                {"_id": user_id},
+                {"$inc": {"page_seq": 1}},
+                projection={"page_seq": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+        return doc["page_seq"] if doc else 1
+    except Exception as e:
+        print(f"Error incrementing page counter: {e}")
+        return 1
+
+
+# ---------------- Page Versions ----------------
+# Listings and comparisons leave out the HTML blob (by far the largest field) and the binary digest
+VERSION_SUMMARY_PROJECTION = {"html_content": 0, "content_sha256": 0}
+
+# Stored HTML is zstd-compressed; compressor objects aren't thread-safe, so one per thread
+_ZSTD_LEVEL = 6
+_zstd_local = threading.local()
+
+
+def _compress_html(html_content: str) -> bytes:
+    compressor = getattr(_zstd_local, "compressor", None)
+    if compressor is None:
+        compressor = _zstd_local.compressor = zstd.ZstdCompressor(level=_ZSTD_LEVEL)
+    return compressor.compress(html_content.encode("utf-8"))
+
+
+def _decompress_html(doc: dict):
+    """Return a version's HTML as text, whether it was stored compressed or not"""
+    if not doc or not doc.get("html_content"):
         return None
-    
-    version = {
+    if doc.get("html_encoding") != "zstd":
+        return doc["html_content"]
+    decompressor = getattr(_zstd_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _zstd_local.decompressor = zstd.ZstdDecompressor()
+    return decompressor.decompress(doc["html_content"]).decode("utf-8")
+
+
+# ✅ UPDATED: Made html_content optional to match scheduler usage
+def text_digest(text_content: str) -> bytes:
+    """SHA-256 of a version's text, stored as content_sha256 so change checks compare 32 bytes"""
+    return hashlib.sha256((text_content or "").encode("utf-8")).digest()
+
+
+def _page_version_doc(page_id: str, text_content: str, url: str, html_content: str = None,
+                      content_hash: str = None, timestamp: datetime = None) -> dict:
+    """Build a page version document (insert_many fills in _id); timestamp defaults to now"""
+    timestamp = timestamp or datetime.utcnow()
+    return {
         "page_id": ObjectId(page_id),
-        "timestamp": datetime.utcnow(),
+        "timestamp": timestamp,
         "text_content": text_content,
-        "html_content": html_content,  # Now optional
+        "content_sha256": text_digest(text_content),
+        "html_content": _compress_html(html_content) if html_content else None,  # Now optional
+        "html_encoding": "zstd" if html_content else None,
         "metadata": {
             "url": url,
             "content_length": len(text_content),
             "word_count": len(text_content.split()) if text_content else 0,
             "html_content_length": len(html_content) if html_content else 0,
-            "fetched_at": datetime.utcnow().isoformat(),
+            "fetched_at": timestamp.isoformat(),
+            "content_hash": content_hash,  # xxh64 of the fetched body, if known
         },
     }
+
+
+async def create_page_version(page_id: str, text_content: str, url: str, html_content: str = None,
+                        content_hash: str = None, timestamp: datetime = None):
+    """Create a new page version with both HTML and text content"""
+    versions = await bulk_create_page_versions([{
+        "page_id": page_id,
+        "text_content": text_content,
+        "url": url,
+        "html_content": html_content,
+        "content_hash": content_hash,
+        "timestamp": timestamp,
+    }])
+    return versions[0] if versions else None  # Raw doc: main.py's response models read _id/ObjectIds directly
+
+
+async def bulk_create_page_versions(versions: list) -> list:
+    """
+    Insert many page versions in one round trip
+    Each item holds create_page_version's keyword arguments; returns the inserted docs
+    """
+    if db is None or not versions:
+        return []
+    
+    docs = [_page_version_doc(**version) for version in versions]
+    return await _insert_many_unordered(versions_collection, docs)
+
+
+async def _insert_many_unordered(collection, docs: list) -> list:
+    """insert_many with ordered=False; returns the docs that were actually written"""
     try:
-        result = versions_collection.insert_one(version)
-        version["_id"] = result.inserted_id
-        return version  # Return raw doc for main.py normalize_doc
+        await collection.insert_many(docs, ordered=False)
+        return docs
+    except BulkWriteError as e:
+        failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        return [doc for i, doc in enumerate(docs) if i not in failed]
     except:
-        return None
+        return []
 
 
-def get_page_versions(page_id: str, limit: int = 10):
-    """Get page versions for a specific page"""
+async def get_page_versions(page_id: str, limit: int = 10, fields: dict = None, before: datetime = None):
+    """
+    Get page versions for a specific page, newest first (without the HTML blob unless fields asks for it)
+    `before` pages back through history: only versions older than that timestamp
+    """
     if db is None:
         return []
     try:
-        versions = versions_collection.find({"page_id": ObjectId(page_id)}).sort("timestamp", DESCENDING).limit(limit)
-        return list(versions)  # Return raw docs for main.py normalize_doc
+        projection = VERSION_SUMMARY_PROJECTION if fields is None else fields
+        query = {"page_id": ObjectId(page_id)}
+        if before is not None:
+            query["timestamp"] = {"$lt": before}
+        return await _find_sorted(versions_collection, query, "timestamp", limit, projection)
     except:
         return []
 
 
-# ---------------- Change Logs ----------------
-def create_change_log(change_data: dict):
-    """Create a new change log entry"""
+async def get_page_version(page_id, version_id, fields: dict = None):
+    """Get one version of a page (None if it belongs to another page)"""
     if db is None:
         return None
-    
+    try:
+        projection = VERSION_SUMMARY_PROJECTION if fields is None else fields
+        docs = await _find_sorted(
+            versions_collection, {"_id": ObjectId(version_id), "page_id": ObjectId(page_id)}, "timestamp", 1, projection
+        )
+        return docs[0] if docs else None
+    except:
+        return None
+
+
+async def get_previous_version_digest(page: dict):
+    """content_sha256 of the page's current version in one indexed lookup (None on a first crawl)"""
+    if db is None:
+        return None
+    try:
+        projection = {"content_sha256": 1}
+        if page.get("current_version_id"):
+            version = await versions_collection.find_one({"_id": ObjectId(page["current_version_id"])}, projection)
+        else:
+            version = await versions_collection.find_one(
+                {"page_id": ObjectId(page["_id"])}, projection, sort=[("timestamp", DESCENDING)]
+            )
+        if not version:
+            return None
+        if version.get("content_sha256") is None:
+            # Written before digests were stored: hash its text once here
+            legacy = await versions_collection.find_one({"_id": version["_id"]}, {"text_content": 1})
+            return text_digest(legacy.get("text_content") if legacy else "")
+        return version["content_sha256"]
+    except Exception as e:
+        print(f"❌ Error getting previous version: {e}")
+        return None
+
+
+async def get_page_version_html(version_id: str):
+    """Fetch and decompress the stored HTML of a single version"""
+    if db is None:
+        return None
+    try:
+        doc = await versions_collection.find_one(
+            {"_id": ObjectId(version_id)},
+            {"html_content": 1, "html_encoding": 1}
+        )
+        return _decompress_html(doc)
+    except:
+        return None
+
+
+# ---------------- Change Logs ----------------
+def _change_log_doc(change_data: dict) -> dict:
+    """Build a change log document from caller-supplied fields"""
     change_data_copy = change_data.copy()
     
     # Handle ObjectId conversion
@@ -404,26 +763,37 @@ def create_change_log(change_data: dict):
     if "timestamp" not in change_data_copy:
         change_data_copy["timestamp"] = datetime.utcnow()
     
-    try:
-        result = changes_collection.insert_one(change_data_copy)
-        return str(result.inserted_id)
-    except:
-        return None
+    return change_data_copy
 
 
-def get_change_logs_for_page(page_id: str, limit: int = 20):
-    """Get change logs for a specific page"""
+async def create_change_log(change_data: dict):
+    """Create a new change log entry"""
+    ids = await bulk_create_change_logs([change_data])
+    return ids[0] if ids else None
+
+
+async def bulk_create_change_logs(changes: list) -> list:
+    """Insert many change log entries in one round trip; returns the inserted ids as strings"""
+    if db is None or not changes:
+        return []
+    
+    docs = [_change_log_doc(change) for change in changes]
+    return [str(doc["_id"]) for doc in await _insert_many_unordered(changes_collection, docs)]
+
+
+async def get_change_logs_for_page(page_id: str, limit: int = 20, fields: dict = None):
+    """Get change logs for a specific page (fields: optional projection)"""
     if db is None:
         return []
     try:
-        changes = changes_collection.find({"page_id": ObjectId(page_id)}).sort("timestamp", DESCENDING).limit(limit)
-        return list(changes)  # Return raw docs for main.py normalize_doc
+        changes = changes_collection.find({"page_id": ObjectId(page_id)}, fields).sort("timestamp", DESCENDING).limit(limit).batch_size(limit)
+        return await changes.to_list(length=limit)  # Raw docs: main.py's response models read _id/ObjectIds directly
     except:
         return []
 
 
-def get_change_logs_for_user(user_id, limit: int = 20):
-    """Get change logs for a specific user"""
+async def get_change_logs_for_user(user_id, limit: int = 20, fields: dict = None):
+    """Get change logs for a specific user (fields: optional projection)"""
     if db is None:
         return []
     
@@ -432,50 +802,74 @@ def get_change_logs_for_user(user_id, limit: int = 20):
         user_id = ObjectId(user_id)
     
     try:
-        changes = changes_collection.find({"user_id": user_id}).sort("timestamp", DESCENDING).limit(limit)
-        return list(changes)  # Return raw docs for main.py normalize_doc
+        return await _find_sorted(changes_collection, {"user_id": user_id}, "timestamp", limit, fields)
     except:
         return []
 
 
 # ---------------- Additional utility functions for scheduler ----------------
-def get_all_active_pages():
+async def get_all_active_pages(fields: dict = None):
     """Get all active pages across all users (for scheduler)"""
     if db is None:
         return []
     try:
-        pages = pages_collection.find({"is_active": True})
-        return list(pages)
+        pages = pages_collection.find({"is_active": True}, fields)
+        return await pages.to_list(length=None)
     except:
         return []
 
 
-def get_pages_due_for_check():
+# Fields the scheduler needs from a due page
+DUE_PAGE_PROJECTION = {
+    "_id": 1, "url": 1, "user_id": 1, "display_name": 1,
+    "check_interval_minutes": 1, "last_checked": 1,
+    "etag": 1, "last_modified": 1, "content_hash": 1,
+}
+
+
+async def get_pages_due_for_check():
     """Get pages that are due for checking based on their interval"""
     if db is None:
         return []
     try:
-        # Get pages that have never been checked or are due for checking
+        # Never checked, or last_checked + interval has passed - evaluated by MongoDB
         now = datetime.utcnow()
         pages = pages_collection.find({
             "is_active": True,
             "$or": [
                 {"last_checked": None},
-                {"last_checked": {"$lte": now}}  # This would need more complex logic for intervals
+                {"$expr": {"$lte": [
+                    {"$add": ["$last_checked", {"$multiply": [{"$ifNull": ["$check_interval_minutes", 1440]}, 60000]}]},
+                    now
+                ]}}
             ]
-        })
-        return list(pages)
+        }, DUE_PAGE_PROJECTION)
+        return await pages.to_list(length=None)
     except:
         return []
 
 
-def get_latest_page_version(page_id: str):
-    """Get the most recent version of a page (for scheduler comparison)"""
+async def has_new_unchecked_pages(since: datetime) -> bool:
+    """Whether an active page created after `since` has never been checked (served by the is_active/last_checked index)"""
+    if db is None:
+        return False
+    try:
+        page = await pages_collection.find_one(
+            {"is_active": True, "last_checked": None, "created_at": {"$gt": since}}, {"_id": 1}
+        )
+        return page is not None
+    except:
+        return False
+
+
+async def get_latest_page_version(page_id: str, fields: dict = None):
+    """Get the most recent version of a page (for scheduler comparison); `fields` narrows the projection"""
     if db is None:
         return None
     try:
-        version = versions_collection.find_one(
+        version = await versions_collection.find_one(
             {"page_id": ObjectId(page_id)},
+            fields or VERSION_SUMMARY_PROJECTION,
             sort=[("timestamp", DESCENDING)]
         )
         return version
@@ -0,0 +1,29 @@
+# backend/app/logging_config.py
+"""
+Root logging through a queue: a logger call on the event loop only enqueues the
+record, and a listener thread does the blocking write to stderr.
+Used by the API (main.py) and the standalone worker (worker.py).
+"""
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: QueueListener = None
+
+
+def setup_logging(level: int = logging.WARNING) -> QueueListener:
+    """Route the root logger through a QueueHandler (first call starts the listener)"""
+    global _listener
+    if _listener is None:
+        log_queue = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)  # Drains what is still queued at exit
+        logging.getLogger().handlers[:] = [QueueHandler(log_queue)]
+    logging.getLogger().setLevel(level)
+    return _listener
@@ -6,6 +6,8 @@ from bson import ObjectId
 from enum import Enum
 import re
 
+_EMAIL_RE = re.compile(r'[^@]+@[^@]+\.[^@]+')  # Compiled once, not looked up per validation
+
 # Simple ObjectId handling for Pydantic V2
 def validate_object_id(v: Any) -> ObjectId:
     if isinstance(v, ObjectId):
@@ -38,7 +40,7 @@ class UserBase(BaseModel):
     @field_validator('email')
     @classmethod
     def validate_email(cls, v):
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
+        if not _EMAIL_RE.match(v):
             raise ValueError('Invalid email format')
         return v
 
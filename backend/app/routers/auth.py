@@ -19,13 +19,16 @@ from ..schemas.auth import ForgotPasswordRequest, ResetPasswordRequest, ForgotPa
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 logger = logging.getLogger(__name__)
 
+# Local development only: print reset links to the console (there is no email sender yet)
+LOG_RESET_LINKS = os.getenv("LOG_RESET_LINKS", "false").lower() == "true"
+
 @router.post("/forgot-password", response_model=ForgotPasswordResponse)
 async def forgot_password(request: ForgotPasswordRequest):
     """
     Initiate password reset process.
     Always returns success to prevent email enumeration attacks.
     """
-    user = get_user_by_email(request.email)
+    user = await get_user_by_email(request.email)
     
     # Always return success to prevent email enumeration
     if not user:
@@ -39,7 +42,7 @@ async def forgot_password(request: ForgotPasswordRequest):
     expires_at = datetime.utcnow() + timedelta(hours=1)  # Token valid for 1 hour
     
     # Save token to database
-    token_created = create_password_reset_token(
+    token_created = await create_password_reset_token(
         token=reset_token,
         user_id=user["_id"],
         expires_at=expires_at
@@ -70,7 +73,7 @@ async def reset_password(request: ResetPasswordRequest):
     Reset user password using a valid reset token.
     """
     # Find valid token
-    token_record = get_valid_password_reset_token(request.token)
+    token_record = await get_valid_password_reset_token(request.token)
     
     if not token_record:
         raise HTTPException(
@@ -79,7 +82,7 @@ async def reset_password(request: ResetPasswordRequest):
         )
     
     # Update user password
-    password_updated = update_user_password(
+    password_updated = await update_user_password(
         user_id=token_record["user_id"],
         new_password=request.new_password
     )
@@ -91,7 +94,7 @@ async def reset_password(request: ResetPasswordRequest):
         )
     
     # Mark token as used
-    mark_password_reset_token_used(request.token)
+    await mark_password_reset_token_used(request.token)
     
     logger.info(f"Password reset successful for user ID: {token_record['user_id']}")
     
@@ -102,17 +105,13 @@ async def reset_password(request: ResetPasswordRequest):
 async def send_reset_email(email: str, token: str):
     """
     Send password reset email to user.
-    For now, this just prints the reset link to console.
+    For now, this only prints the reset link to console when LOG_RESET_LINKS=true.
     In production, you would integrate with an email service.
     """
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
     reset_url = f"{frontend_url}/reset-password/{token}"
     
-    # For testing - print to console
-    print("=" * 60)
-    print("📧 PASSWORD RESET EMAIL (TEST MODE)")
-    print("=" * 60)
-    print(f"To: {email}")
-    print(f"Reset URL: {reset_url}")
-    print(f"Token: {token}")
-    print("=" * 60)
\ No newline at end of file
+    # The link is a live credential: the logger never sees it, only the opt-in dev print
+    logger.info("📧 Password reset requested for %s", email)
+    if LOG_RESET_LINKS:
+        print(f"📧 PASSWORD RESET EMAIL (TEST MODE)\nTo: {email}\nReset URL: {reset_url}")
\ No newline at end of file
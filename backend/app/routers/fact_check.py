@@ -1,20 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+import asyncio
 from typing import List, Optional
+from collections import Counter
 from datetime import datetime
+from string import Template
 from bson import ObjectId
 from ..database import (
     versions_collection, 
     pages_collection, 
     get_page_versions,
     get_tracked_page,
-    doc_to_dict
+    doc_to_dict,
 )
 from ..services.fact_check_service import FactCheckService
 from ..services.diff_service import DiffService
 from ..schemas.fact_check import FactCheckRequest, FactCheckResponse, FactCheckItem, ClaimType, Verdict
 from ..schemas.diff import DiffRequest, DiffResponse, ContentChange
-import resend  # ✅ ADD THIS IMPORT
-import os  # ✅ ADD THIS IMPORT
+from ..config import EMAIL_CFG, get_resend
+import logging
+
+# Per-request diagnostics go through logging (lazy %s args) rather than print
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/fact-check", tags=["fact-check"])
 
@@ -23,30 +29,39 @@ router = APIRouter(prefix="/api/fact-check", tags=["fact-check"])
 
 diff_service = DiffService()
 
-# ✅ ADD THIS FUNCTION
-def send_fact_check_email(to_email: str, page_title: str, page_url: str, results_summary: dict):
-    """Send fact-check results email via Resend"""
-    try:
-        # Configure Resend
-        resend.api_key = os.getenv("RESEND_API_KEY")
-        if not resend.api_key:
-            print("⚠️ RESEND_API_KEY not found in environment")
-            return False
-        
-        # Get your from email from environment
-        from_email = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
-        
-        # Calculate credibility score
-        total = results_summary.get("total_claims", 0)
-        verified = results_summary.get("verified_claims", 0)
-        credibility_score = int((verified / total * 100)) if total > 0 else 0
-        
-        # Prepare email
-        params = {
-            "from": f"FreshLense <{from_email}>",
-            "to": [to_email],
-            "subject": f"📋 FreshLense Fact-Check Results: {page_title[:50]}{'...' if len(page_title) > 50 else ''}",
-            "html": f"""
+# Only what each handler reads crosses the wire (versions also carry HTML and metadata)
+CHECK_VERSION_FIELDS = {"text_content": 1, "page_id": 1}
+COMPARE_VERSION_FIELDS = {"text_content": 1, "page_id": 1, "timestamp": 1}
+PAGE_INFO_FIELDS = {"url": 1, "display_name": 1}
+CONTENT_PREVIEW_CHARS = 200
+MAX_DIRECT_CHARS = 15000  # /check-direct input cap
+TRUNCATED_SUFFIX = "... [content truncated]"
+# Version list: the preview is cut server-side; one extra char says whether it was truncated
+VERSION_LIST_FIELDS = {
+    "timestamp": 1,
+    "text_preview": {"$substrCP": [{"$ifNull": ["$text_content", ""]}, 0, CONTENT_PREVIEW_CHARS + 1]},
+    "metadata.word_count": 1,
+    "metadata.content_length": 1,
+}
+
+def require_object_id(value: str, what: str = "version") -> ObjectId:
+    """400 for a malformed id, checked before the handlers' catch-all turns InvalidId into a 500"""
+    if not ObjectId.is_valid(value):
+        raise HTTPException(status_code=400, detail=f"Invalid {what} ID")
+    return ObjectId(value)
+
+def verdict_counts(results: List[FactCheckItem]) -> dict:
+    """FactCheckResponse's claim counts from one pass over the results"""
+    counts = Counter(r.verdict for r in results)
+    return {
+        "total_claims": len(results),
+        "verified_claims": counts[Verdict.TRUE],
+        "unverified_claims": counts[Verdict.FALSE],
+        "inconclusive_claims": counts[Verdict.UNVERIFIED],
+    }
+
+# Fact-check email bodies, built once; send_fact_check_email only fills in the values
+_FACT_CHECK_EMAIL_HTML = Template("""
             <!DOCTYPE html>
             <html>
             <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
@@ -58,19 +73,19 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
                 <div style="background: #f8f9fa; padding: 25px; border-radius: 0 0 10px 10px;">
                     <!-- Content Info -->
                     <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
-                        <h3 style="margin-top: 0; color: #333;">{page_title}</h3>
-                        <p style="color: #666; margin-bottom: 5px;"><strong>URL:</strong> {page_url}</p>
-                        <p style="color: #666; margin: 0;"><strong>Analyzed:</strong> {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}</p>
+                        <h3 style="margin-top: 0; color: #333;">$page_title</h3>
+                        <p style="color: #666; margin-bottom: 5px;"><strong>URL:</strong> $page_url</p>
+                        <p style="color: #666; margin: 0;"><strong>Analyzed:</strong> $analyzed_at</p>
                     </div>
                     
                     <!-- Credibility Score -->
                     <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); text-align: center;">
                         <h3 style="margin-top: 0; color: #333;">Credibility Score</h3>
-                        <div style="font-size: 48px; font-weight: bold; color: {"#51cf66" if credibility_score >= 80 else "#ff922b" if credibility_score >= 60 else "#ff6b6b"};">
-                            {credibility_score}%
+                        <div style="font-size: 48px; font-weight: bold; color: $score_color;">
+                            $credibility_score%
                         </div>
                         <p style="color: #666; margin-top: 10px;">
-                            Based on {total} claims analyzed
+                            Based on $total claims analyzed
                         </p>
                     </div>
                     
@@ -82,7 +97,7 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
                             <!-- Verified -->
                             <div style="text-align: center; padding: 15px; background: #f0f9ff; border-radius: 8px;">
                                 <div style="font-size: 24px; font-weight: bold; color: #51cf66;">
-                                    {results_summary.get('verified_claims', 0)}
+                                    $verified
                                 </div>
                                 <div style="color: #666; font-size: 14px;">Verified Claims</div>
                             </div>
@@ -90,7 +105,7 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
                             <!-- Unverified -->
                             <div style="text-align: center; padding: 15px; background: #fff7ed; border-radius: 8px;">
                                 <div style="font-size: 24px; font-weight: bold; color: #ff922b;">
-                                    {results_summary.get('unverified_claims', 0)}
+                                    $unverified
                                 </div>
                                 <div style="color: #666; font-size: 14px;">Unverified Claims</div>
                             </div>
@@ -98,7 +113,7 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
                             <!-- False -->
                             <div style="text-align: center; padding: 15px; background: #fef2f2; border-radius: 8px;">
                                 <div style="font-size: 24px; font-weight: bold; color: #ff6b6b;">
-                                    {results_summary.get('inconclusive_claims', 0)}
+                                    $inconclusive
                                 </div>
                                 <div style="color: #666; font-size: 14px;">False Claims</div>
                             </div>
@@ -106,7 +121,7 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
                             <!-- Total -->
                             <div style="text-align: center; padding: 15px; background: #f8f9fa; border-radius: 8px;">
                                 <div style="font-size: 24px; font-weight: bold; color: #667eea;">
-                                    {total}
+                                    $total
                                 </div>
                                 <div style="color: #666; font-size: 14px;">Total Claims</div>
                             </div>
@@ -115,7 +130,7 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
                     
                     <!-- Action Button -->
                     <div style="text-align: center; margin-top: 25px;">
-                        <a href="{page_url}" 
+                        <a href="$page_url" 
                            style="display: inline-block; background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; font-weight: bold;"
                            target="_blank">
                             View Original Content
@@ -132,54 +147,92 @@ def send_fact_check_email(to_email: str, page_title: str, page_url: str, results
                 </div>
             </body>
             </html>
-            """,
-            "text": f"""FreshLense Fact-Check Results
+            """)
+
+_FACT_CHECK_EMAIL_TEXT = Template("""FreshLense Fact-Check Results
 
-Content: {page_title}
-URL: {page_url}
-Analyzed: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}
+Content: $page_title
+URL: $page_url
+Analyzed: $analyzed_at
 
 Results Summary:
-✅ Verified Claims: {results_summary.get('verified_claims', 0)}
-❓ Unverified Claims: {results_summary.get('unverified_claims', 0)}
-❌ False Claims: {results_summary.get('inconclusive_claims', 0)}
-📊 Total Claims: {total}
-🎯 Credibility Score: {credibility_score}%
+✅ Verified Claims: $verified
+❓ Unverified Claims: $unverified
+❌ False Claims: $inconclusive
+📊 Total Claims: $total
+🎯 Credibility Score: $credibility_score%
 
-View original content: {page_url}
+View original content: $page_url
 
-This is an automated message from FreshLense Web Content Monitoring System."""
+This is an automated message from FreshLense Web Content Monitoring System.""")
+
+# ✅ ADD THIS FUNCTION
+def send_fact_check_email(to_email: str, page_title: str, page_url: str, results_summary: dict):
+    """Send fact-check results email via Resend"""
+    try:
+        if not EMAIL_CFG.api_key:
+            logger.warning("⚠️ RESEND_API_KEY not found in environment")
+            return False
+        
+        from_email = EMAIL_CFG.from_email
+        
+        # Calculate credibility score
+        total = results_summary.get("total_claims", 0)
+        verified = results_summary.get("verified_claims", 0)
+        credibility_score = int((verified / total * 100)) if total > 0 else 0
+        
+        # Per-call values for the templates; the color is picked once here
+        fields = {
+            "page_title": page_title,
+            "page_url": page_url,
+            "analyzed_at": datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC'),
+            "score_color": "#51cf66" if credibility_score >= 80 else "#ff922b" if credibility_score >= 60 else "#ff6b6b",
+            "credibility_score": credibility_score,
+            "total": total,
+            "verified": verified,
+            "unverified": results_summary.get("unverified_claims", 0),
+            "inconclusive": results_summary.get("inconclusive_claims", 0),
+        }
+        
+        # Prepare email
+        params = {
+            "from": f"FreshLense <{from_email}>",
+            "to": [to_email],
+            "subject": f"📋 FreshLense Fact-Check Results: {page_title[:50]}{'...' if len(page_title) > 50 else ''}",
+            "html": _FACT_CHECK_EMAIL_HTML.substitute(fields),
+            "text": _FACT_CHECK_EMAIL_TEXT.substitute(fields),
         }
         
-        email = resend.Emails.send(params)
-        print(f"✅ Fact-check email sent to {to_email}, ID: {email['id']}")
+        email = get_resend().Emails.send(params)  # Imports the SDK on the first send
+        logger.info("✅ Fact-check email sent to %s, ID: %s", to_email, email['id'])
         return True
         
     except Exception as e:
-        print(f"❌ Failed to send email to {to_email}: {e}")
+        logger.error("❌ Failed to send email to %s: %s", to_email, e)
         return False
 
 @router.post("/check", response_model=FactCheckResponse)
 async def fact_check_page(request: FactCheckRequest, current_user: dict = Depends(lambda: None)):
     """Perform fact checking on a page version"""
+    version_oid = require_object_id(request.version_id)
     try:
         # 🚨 CRITICAL FIX: Create fresh FactCheckService instance
         fact_check_service = FactCheckService()
-        print("🔄 DEBUG: Created fresh FactCheckService instance")
+        logger.debug("🔄 Created fresh FactCheckService instance")
         
         # Get the specific page version
-        version = versions_collection.find_one({"_id": ObjectId(request.version_id)})
+        version = await versions_collection.find_one({"_id": version_oid}, CHECK_VERSION_FIELDS)
         if not version:
             raise HTTPException(status_code=404, detail="Page version not found")
         
         # Get page info and verify ownership
-        page = get_tracked_page(str(version["page_id"]))
+        page = await get_tracked_page(str(version["page_id"]), PAGE_INFO_FIELDS)
         if not page:
             raise HTTPException(status_code=404, detail="Page not found")
         
         # Perform fact checking on text content
         text_content = version.get("text_content", "")
-        print(f"🔍 DEBUG: Starting fact check on {len(text_content)} chars of content")
+        logger.debug("🔍 Starting fact check on %d chars of content", len(text_content))
         fact_check_results = await fact_check_service.check_content(text_content)
         
         response = FactCheckResponse(
@@ -189,10 +242,7 @@ async def fact_check_page(request: FactCheckRequest, current_user: dict = Depend
             page_title=page.get("display_name", ""),
             checked_at=datetime.utcnow(),
             results=fact_check_results,
-            total_claims=len(fact_check_results),
-            verified_claims=len([r for r in fact_check_results if r.verdict == Verdict.TRUE]),
-            unverified_claims=len([r for r in fact_check_results if r.verdict == Verdict.FALSE]),
-            inconclusive_claims=len([r for r in fact_check_results if r.verdict == Verdict.UNVERIFIED])
+            **verdict_counts(fact_check_results)
         )
         
         # ✅ OPTIONAL: Add email sending for regular fact-check too
@@ -201,33 +251,43 @@ async def fact_check_page(request: FactCheckRequest, current_user: dict = Depend
         return response
         
     except Exception as e:
-        print(f"💥 Fact checking failed: {str(e)}")
+        logger.error("💥 Fact checking failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Fact checking failed: {str(e)}")
 
 @router.post("/check-direct", response_model=FactCheckResponse)
-async def fact_check_direct_content(request: dict, current_user: dict = Depends(lambda: None)):
+async def fact_check_direct_content(request: dict, background_tasks: BackgroundTasks,
+                                    current_user: dict = Depends(lambda: None)):
     """Perform fact checking on directly provided text content"""
+    text_content = request.get("content", "")
+    # isspace() instead of strip(): no copy of an arbitrarily long body just to test it.
+    # Checked before the try so these stay 400s
+    if not text_content:
+        raise HTTPException(status_code=400, detail="Content cannot be empty")
+    if not isinstance(text_content, str):  # The body is an untyped dict
+        raise HTTPException(status_code=400, detail="Content must be a string")
+    if text_content.isspace():
+        raise HTTPException(status_code=400, detail="Content cannot be empty")
+    
     try:
         # 🚨 CRITICAL FIX: Create fresh FactCheckService instance
         fact_check_service = FactCheckService()
-        print("🔄 DEBUG: Created fresh FactCheckService instance for direct check")
+        logger.debug("🔄 Created fresh FactCheckService instance for direct check")
         
-        text_content = request.get("content", "")
         page_url = request.get("page_url", "Direct input")
         page_title = request.get("page_title", "User provided content")
         user_email = request.get("user_email")  # ✅ Get email from request
         
-        if not text_content.strip():
-            raise HTTPException(status_code=400, detail="Content cannot be empty")
-        
         # Limit content length to prevent abuse
-        if len(text_content) > 15000:
-            text_content = text_content[:15000] + "... [content truncated]"
+        if len(text_content) > MAX_DIRECT_CHARS:
+            text_content = text_content[:MAX_DIRECT_CHARS] + TRUNCATED_SUFFIX
         
-        print(f"🔍 DEBUG: Starting direct fact check on {len(text_content)} chars of content")
+        logger.debug("🔍 Starting direct fact check on %d chars of content", len(text_content))
         # Perform fact checking on direct text content
         fact_check_results = await fact_check_service.check_content(text_content)
         
+        # One count pass, shared by the response and the email summary
+        counts = verdict_counts(fact_check_results)
+        
         # Prepare response
         response = FactCheckResponse(
             page_id="direct_input",
@@ -236,53 +296,39 @@ async def fact_check_direct_content(request: dict, current_user: dict = Depends(
             page_title=page_title,
             checked_at=datetime.utcnow(),
             results=fact_check_results,
-            total_claims=len(fact_check_results),
-            verified_claims=len([r for r in fact_check_results if r.verdict == Verdict.TRUE]),
-            unverified_claims=len([r for r in fact_check_results if r.verdict == Verdict.FALSE]),
-            inconclusive_claims=len([r for r in fact_check_results if r.verdict == Verdict.UNVERIFIED])
+            **counts
         )
         
         # ✅ SEND EMAIL IF USER PROVIDED EMAIL
-        if user_email and os.getenv("EMAIL_ENABLED", "true").lower() == "true":
-            try:
-                # Prepare results summary
-                results_summary = {
-                    "total_claims": len(fact_check_results),
-                    "verified_claims": len([r for r in fact_check_results if r.verdict == Verdict.TRUE]),
-                    "unverified_claims": len([r for r in fact_check_results if r.verdict == Verdict.FALSE]),
-                    "inconclusive_claims": len([r for r in fact_check_results if r.verdict == Verdict.UNVERIFIED])
-                }
-                
-                # Send email
-                email_sent = send_fact_check_email(
-                    to_email=user_email,
-                    page_title=page_title,
-                    page_url=page_url,
-                    results_summary=results_summary
-                )
-                
-                if email_sent:
-                    print(f"📧 Email notification sent to {user_email}")
-                else:
-                    print(f"⚠️ Email notification failed for {user_email}")
-                
-            except Exception as email_error:
-                print(f"⚠️ Email sending error (but fact-check succeeded): {email_error}")
-                # Don't fail the request if email fails
+        if user_email and EMAIL_CFG.enabled:
+            # After the response is sent; BackgroundTasks runs this sync function in the
+            # threadpool, so the blocking Resend call stays off the event loop too.
+            # send_fact_check_email logs (and swallows) its own failures.
+            background_tasks.add_task(
+                send_fact_check_email,
+                to_email=user_email,
+                page_title=page_title,
+                page_url=page_url,
+                results_summary=counts,
+            )
         
         return response
         
     except Exception as e:
-        print(f"💥 Direct fact checking failed: {str(e)}")
+        logger.error("💥 Direct fact checking failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Direct fact checking failed: {str(e)}")
 
 @router.post("/compare", response_model=DiffResponse)
 async def compare_versions(request: DiffRequest, current_user: dict = Depends(lambda: None)):
     """Compare two page versions and show differences"""
+    old_oid = require_object_id(request.old_version_id)
+    new_oid = require_object_id(request.new_version_id)
     try:
-        # Get both versions
-        old_version = versions_collection.find_one({"_id": ObjectId(request.old_version_id)})
-        new_version = versions_collection.find_one({"_id": ObjectId(request.new_version_id)})
+        # Get both versions (concurrently: two round trips in the time of one)
+        old_version, new_version = await asyncio.gather(
+            versions_collection.find_one({"_id": old_oid}, COMPARE_VERSION_FIELDS),
+            versions_collection.find_one({"_id": new_oid}, COMPARE_VERSION_FIELDS),
+        )
         
         if not old_version or not new_version:
             raise HTTPException(status_code=404, detail="One or both versions not found")
@@ -312,16 +358,20 @@ async def compare_versions(request: DiffRequest, current_user: dict = Depends(la
 @router.get("/page/{page_id}/versions")
 async def get_page_versions_for_factcheck(page_id: str, limit: int = 20, current_user: dict = Depends(lambda: None)):
     """Get page versions with basic info for fact check UI"""
+    require_object_id(page_id, "page")
     try:
-        versions = get_page_versions(page_id, limit)
-        page = get_tracked_page(page_id)
+        versions, page = await asyncio.gather(
+            get_page_versions(page_id, limit, fields=VERSION_LIST_FIELDS),
+            get_tracked_page(page_id, PAGE_INFO_FIELDS),
+        )
         
         version_list = []
         for version in versions:
+            preview = version.get("text_preview", "")
             version_list.append({
                 "version_id": str(version["_id"]),
                 "timestamp": version["timestamp"],
-                "content_preview": version.get("text_content", "")[:200] + "..." if len(version.get("text_content", "")) > 200 else version.get("text_content", ""),
+                "content_preview": preview[:CONTENT_PREVIEW_CHARS] + "..." if len(preview) > CONTENT_PREVIEW_CHARS else preview,
                 "word_count": version.get("metadata", {}).get("word_count", 0),
                 "content_length": version.get("metadata", {}).get("content_length", 0)
             })
@@ -343,7 +393,7 @@ async def debug_serp_integration():
     try:
         # 🚨 CRITICAL FIX: Create fresh FactCheckService instance
         fact_check_service = FactCheckService()
-        print("🔄 DEBUG: Created fresh FactCheckService instance for debug")
+        logger.debug("🔄 Created fresh FactCheckService instance for debug")
         
         # Check configuration
         config_status = fact_check_service.check_serp_status()
@@ -1,361 +1,72 @@
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import DuplicateKeyError, ConnectionFailure, ServerSelectionTimeoutError
-from datetime import datetime, timedelta
-import os
-from bson import ObjectId
-from passlib.context import CryptContext
+from datetime import datetime
 import asyncio
+import time
 from typing import Optional
 import logging
 from difflib import SequenceMatcher
-import resend  # ✅ ADD RESEND IMPORT
+from cachetools import LRUCache
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Same async (motor) helpers as the API; the caller runs init_db() on its loop first
+from .database import (
+    get_user_by_id, get_pages_due_for_check, has_new_unchecked_pages, get_latest_page_version, get_page_version, text_digest,
+    bulk_create_page_versions, bulk_create_change_logs, bulk_update_tracked_pages,
+)
 
-# MongoDB connection
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = None
-db = None
-
-try:
-    client = MongoClient(MONGO_URI)
-    client.admin.command('ping')  # Test the connection
-    print("✅ MongoDB connection successful!")
-    db = client['freshlense']
-
-    # Collections
-    users_collection = db['users']
-    pages_collection = db['tracked_pages']
-    versions_collection = db['page_versions']
-    changes_collection = db['change_logs']
-
-    # Indexes
-    def create_indexes():
-        users_collection.create_index([("email", ASCENDING)], unique=True)
-        pages_collection.create_index([("user_id", ASCENDING), ("url", ASCENDING)], unique=True)
-        pages_collection.create_index([("user_id", ASCENDING), ("is_active", ASCENDING)])
-        versions_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
-        changes_collection.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
-        changes_collection.create_index([("page_id", ASCENDING), ("timestamp", DESCENDING)])
-        print("✅ Database indexes created successfully!")
-
-    create_indexes()
-
-except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    client = None
-    db = None
-
-
-# ---------------- Helper ----------------
-def is_db_available():
-    return db is not None
-
-
-def doc_to_dict(doc):
-    """Convert MongoDB ObjectIds -> str recursively"""
-    if doc is None:
-        return None
-    if "_id" in doc:
-        doc["_id"] = str(doc["_id"])
-    for key, value in list(doc.items()):
-        if isinstance(value, ObjectId):
-            doc[key] = str(value)
-        elif isinstance(value, dict):
-            doc[key] = doc_to_dict(value)
-        elif isinstance(value, list):
-            doc[key] = [doc_to_dict(v) if isinstance(v, dict) else str(v) if isinstance(v, ObjectId) else v for v in value]
-    return doc
-
-
-# ---------------- User ----------------
-def get_user_by_email(email: str):
-    """Get user by email address"""
-    if db is None:
-        return None
-    user = users_collection.find_one({"email": email})
-    return user  # Return raw doc (main.py expects ObjectId format)
-
-
-def get_user_by_id(user_id):
-    """Get user by ID"""
-    if db is None:
-        return None
-    try:
-        # Handle both ObjectId and string user_id
-        if isinstance(user_id, str):
-            user_id = ObjectId(user_id)
-        user = users_collection.find_one({"_id": user_id})
-        return user
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
-
-
-def create_user(user_data: dict):
-    """Create a new user with hashed password"""
-    if db is None:
-        return None
-    hashed_password = pwd_context.hash(user_data['password'])
-    user_doc = {
-        "email": user_data['email'],
-        "hashed_password": hashed_password,
-        "created_at": datetime.utcnow(),
-        "notification_preferences": {
-            "email_alerts": True,
-            "frequency": "immediately"
-        }
-    }
-    try:
-        result = users_collection.insert_one(user_doc)
-        user_doc["_id"] = result.inserted_id
-        return user_doc  # Return with ObjectId for main.py normalize_doc
-    except DuplicateKeyError:
-        return None
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-# ---------------- Tracked Pages ----------------
-def get_tracked_pages(user_id, active_only: bool = True):
-    """Get all tracked pages for a user"""
-    if db is None:
-        return []
-    
-    # Handle both ObjectId and string user_id
-    if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
-    
-    query = {"user_id": user_id}
-    if active_only:
-        query["is_active"] = True
-    pages = pages_collection.find(query).sort("created_at", DESCENDING)
-    return list(pages)  # Return raw docs for main.py normalize_doc
-
-
-def get_tracked_page(page_id: str):
-    """Get a single tracked page by ID"""
-    if db is None:
-        return None
-    try:
-        page = pages_collection.find_one({"_id": ObjectId(page_id)})
-        return page  # Return raw doc
-    except:
-        return None
-
-
-def create_tracked_page(page_data: dict, user_id):
-    """Create a new tracked page"""
-    if db is None:
-        return None
-    
-    # Handle both ObjectId and string user_id
-    if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
-    
-    page_doc = {
-        "user_id": user_id,
-        "url": page_data["url"],
-        "display_name": page_data.get("display_name") or page_data["url"],
-        "check_interval_minutes": page_data.get("check_interval_minutes", 1440),
-        "is_active": True,
-        "created_at": datetime.utcnow(),
-        "last_checked": None,
-        "last_change_detected": None,
-        "current_version_id": None,
-    }
-    try:
-        result = pages_collection.insert_one(page_doc)
-        page_doc["_id"] = result.inserted_id
-        return page_doc  # Return raw doc for main.py normalize_doc
-    except DuplicateKeyError:
-        return None
-
-
-def update_tracked_page(page_id: str, update_data: dict) -> bool:
-    """Update a tracked page"""
-    if db is None:
-        return False
-    
-    # Handle ObjectId conversion for current_version_id
-    update_data_copy = update_data.copy()
-    if "current_version_id" in update_data_copy and isinstance(update_data_copy["current_version_id"], str):
-        update_data_copy["current_version_id"] = ObjectId(update_data_copy["current_version_id"])
-    
-    try:
-        result = pages_collection.update_one({"_id": ObjectId(page_id)}, {"$set": update_data_copy})
-        return result.modified_count > 0
-    except:
-        return False
-
-
-def delete_tracked_page(page_id: str) -> bool:
-    """Delete a tracked page by ID"""
-    if db is None:
-        return False
-    try:
-        result = pages_collection.delete_one({"_id": ObjectId(page_id)})
-        return result.deleted_count > 0
-    except:
-        return False
-
-
-# ---------------- Page Versions ----------------
-def create_page_version(page_id: str, text_content: str, url: str, html_content: str = None):
-    """Create a new page version"""
-    if db is None:
-        return None
-    
-    version = {
-        "page_id": ObjectId(page_id),
-        "timestamp": datetime.utcnow(),
-        "text_content": text_content,
-        "html_content": html_content,  # Optional parameter
-        "metadata": {
-            "url": url,
-            "content_length": len(text_content),
-            "word_count": len(text_content.split()) if text_content else 0,
-            "fetched_at": datetime.utcnow().isoformat(),
-        },
-    }
-    try:
-        result = versions_collection.insert_one(version)
-        version["_id"] = result.inserted_id
-        return version  # Return raw doc for main.py normalize_doc
-    except:
-        return None
 
+# ---------------- MonitoringScheduler Class ----------------
+from .crawler import ContentFetcher, UNCHANGED, conditional_headers
+from .config import EMAIL_CFG, get_resend
 
-def get_page_versions(page_id: str, limit: int = 10):
-    """Get page versions for a specific page"""
-    if db is None:
-        return []
-    try:
-        versions = versions_collection.find({"page_id": ObjectId(page_id)}).sort("timestamp", DESCENDING).limit(limit)
-        return list(versions)  # Return raw docs for main.py normalize_doc
-    except:
-        return []
+# Set up logging for scheduler module
+logger = logging.getLogger(__name__)
 
 
-# ---------------- Change Logs ----------------
-def create_change_log(change_data: dict):
-    """Create a new change log entry"""
-    if db is None:
-        return None
+class FlushQueue:
+    """
+    Coalesces tracked-page updates from concurrent checks into bulk writes
+    Pending updates go out once max_ops pile up or the oldest is max_delay seconds old;
+    callers await aflush() at the end of a sweep for the remainder
+    """
     
-    change_data_copy = change_data.copy()
+    def __init__(self, max_ops: int = 500, max_delay: float = 0.05):
+        self.max_ops = max_ops
+        self.max_delay = max_delay
+        self._pending = []
+        self._oldest = None
+        self._in_flight = set()  # Threshold flushes started by update_page
     
-    # Handle ObjectId conversion
-    if "page_id" in change_data_copy and isinstance(change_data_copy["page_id"], str):
-        change_data_copy["page_id"] = ObjectId(change_data_copy["page_id"])
-    if "user_id" in change_data_copy and isinstance(change_data_copy["user_id"], str):
-        change_data_copy["user_id"] = ObjectId(change_data_copy["user_id"])
+    def update_page(self, page_id: str, update_data: dict):
+        """Queue a $set for one tracked page"""
+        if not self._pending:
+            self._oldest = time.monotonic()
+        self._pending.append((page_id, update_data))
+        if len(self._pending) >= self.max_ops or time.monotonic() - self._oldest >= self.max_delay:
+            task = asyncio.ensure_future(self.flush())
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
     
-    # Ensure timestamp is set
-    if "timestamp" not in change_data_copy:
-        change_data_copy["timestamp"] = datetime.utcnow()
+    async def flush(self) -> int:
+        """Write everything pending; returns the modified count"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        modified = await bulk_update_tracked_pages(pending)
+        logger.debug(f"Flushed {len(pending)} page updates ({modified} modified)")
+        return modified
     
-    try:
-        result = changes_collection.insert_one(change_data_copy)
-        return str(result.inserted_id)
-    except:
-        return None
-
-
-def get_change_logs_for_page(page_id: str, limit: int = 20):
-    """Get change logs for a specific page"""
-    if db is None:
-        return []
-    try:
-        changes = changes_collection.find({"page_id": ObjectId(page_id)}).sort("timestamp", DESCENDING).limit(limit)
-        return list(changes)  # Return raw docs for main.py normalize_doc
-    except:
-        return []
-
-
-def get_change_logs_for_user(user_id, limit: int = 20):
-    """Get change logs for a specific user"""
-    if db is None:
-        return []
-    
-    # Handle both ObjectId and string user_id
-    if isinstance(user_id, str):
-        user_id = ObjectId(user_id)
-    
-    try:
-        changes = changes_collection.find({"user_id": user_id}).sort("timestamp", DESCENDING).limit(limit)
-        return list(changes)  # Return raw docs for main.py normalize_doc
-    except:
-        return []
-
-
-# ---------------- Additional utility functions for scheduler ----------------
-def get_all_active_pages():
-    """Get all active pages across all users (for scheduler)"""
-    if db is None:
-        return []
-    try:
-        pages = pages_collection.find({"is_active": True})
-        return list(pages)
-    except:
-        return []
+    async def aflush(self) -> int:
+        """Wait for threshold flushes still running, then write the remainder"""
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        return await self.flush()
 
 
-def get_pages_due_for_check():
-    """Get pages that are due for checking based on their interval"""
-    if db is None:
-        return []
-    try:
-        # Get pages that have never been checked or are due for checking
-        now = datetime.utcnow()
-        pages = pages_collection.find({
-            "is_active": True,
-            "$or": [
-                {"last_checked": None},
-                {"last_checked": {"$lte": now}}  # This would need more complex logic for intervals
-            ]
-        })
-        return list(pages)
-    except:
-        return []
-
-
-def get_latest_page_version(page_id: str):
-    """Get the most recent version of a page (for scheduler comparison)"""
-    if db is None:
-        return None
-    try:
-        # Get the second-to-last version for comparison (skip the most recent)
-        versions = list(versions_collection.find(
-            {"page_id": ObjectId(page_id)},
-            sort=[("timestamp", DESCENDING)],
-            limit=2
-        ))
-        
-        # Return the previous version if we have at least 2 versions
-        if len(versions) > 1:
-            return versions[1]  # Second most recent
-        elif len(versions) == 1:
-            return None  # Only one version exists, no comparison possible
-        else:
-            return None  # No versions exist
-    except:
-        return None
-
-
-# ---------------- MonitoringScheduler Class ----------------
-from .crawler import ContentFetcher
-
-# Set up logging for scheduler module
-logger = logging.getLogger(__name__)
-
 class MonitoringScheduler:
     """Background scheduler for monitoring webpage changes"""
     
+    WAKE_DELAY = 2.0  # Seconds between schedule_page's wake-up and the sweep it triggers
+    NEW_PAGE_POLL = 5.0  # Seconds between checks for pages added by other processes (API workers)
+    
     def __init__(self, check_interval: int = 60):
         """
         Initialize the scheduler
@@ -368,12 +79,15 @@ class MonitoringScheduler:
         self.task: Optional[asyncio.Task] = None
         self._loop = None
         self.content_fetcher = ContentFetcher()  # Initialize the content fetcher
+        # page_id -> hash of the last stored body, so hot pages skip the DB lookup too
+        self._content_hashes = LRUCache(maxsize=10_000)
+        self._page_writes = FlushQueue()  # last_checked/validator updates, bulk-written per sweep
+        self._wake = asyncio.Event()  # Set by schedule_page: new pages get an early sweep
         
         # ✅ EMAIL CONFIGURATION
-        self.email_enabled = os.getenv("EMAIL_ENABLED", "true").lower() == "true"
+        self.email_enabled = EMAIL_CFG.enabled
         if self.email_enabled:
-            resend.api_key = os.getenv("RESEND_API_KEY")
-            if not resend.api_key:
+            if not EMAIL_CFG.api_key:  # The SDK itself is only imported on the first send
                 logger.warning("EMAIL_ENABLED is true but RESEND_API_KEY is missing")
                 self.email_enabled = False
             else:
@@ -402,25 +116,47 @@ class MonitoringScheduler:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        await self.content_fetcher.aclose()
         logger.info("Monitoring scheduler stopped")
         
     async def _run_scheduler(self):
         """Main scheduler loop"""
         while self.running:
             try:
+                sweep_started = datetime.utcnow()
                 await self._check_pages()
-                await asyncio.sleep(self.check_interval)
+                await self._wait_for_next_sweep(sweep_started)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
                 await asyncio.sleep(self.check_interval)
                 
+    async def _wait_for_next_sweep(self, since: datetime):
+        """
+        Sleep check_interval, or less once new pages exist. schedule_page's flag only
+        reaches this process; pages added through API workers (RUN_SCHEDULER=false
+        with app.worker) are noticed by polling for never-checked pages created since
+        the last sweep started, every NEW_PAGE_POLL seconds
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.check_interval
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                await asyncio.wait_for(self._wake.wait(), min(self.NEW_PAGE_POLL, remaining))
+                # Let the rest of a burst (e.g. the extension adding several tabs) land in the same sweep
+                await asyncio.sleep(self.WAKE_DELAY)
+                break
+            except asyncio.TimeoutError:
+                if await has_new_unchecked_pages(since):
+                    break
+        self._wake.clear()
+        
     async def _check_pages(self):
         """Check all pages that are due for monitoring"""
         try:
             # Get pages due for checking
-            pages = self._get_pages_due_for_check()
+            pages = await self._get_pages_due_for_check()
             
             if not pages:
                 return
@@ -430,119 +166,149 @@ class MonitoringScheduler:
             
             # Process pages concurrently (but limit concurrency)
             semaphore = asyncio.Semaphore(5)  # Limit to 5 concurrent requests
-            tasks = [self._check_single_page(page, semaphore) for page in pages]
+            detected = []  # Changes found this sweep, written together afterwards
+            tasks = [self._check_single_page(page, semaphore, detected) for page in pages]
             
             if tasks:
                 await asyncio.gather(*tasks, return_exceptions=True)
+            
+            await self._flush_detected_changes(detected)
                 
         except Exception as e:
             logger.error(f"Error checking pages: {e}")
+        finally:
+            await self._page_writes.aflush()
     
-    def _get_pages_due_for_check(self):
+    async def _get_pages_due_for_check(self):
         """Get pages that are actually due for checking based on their interval"""
         try:
-            all_active_pages = get_pages_due_for_check()
-            now = datetime.utcnow()
-            due_pages = []
-            
-            for page in all_active_pages:
-                last_checked = page.get("last_checked")
-                interval_minutes = page.get("check_interval_minutes", 1440)  # Default 24 hours
-                
-                # If never checked, or interval has passed
-                if not last_checked:
-                    due_pages.append(page)
-                else:
-                    next_check = last_checked + timedelta(minutes=interval_minutes)
-                    if now >= next_check:
-                        due_pages.append(page)
-            
-            return due_pages
+            # Interval math (default 24 hours) happens in the query itself
+            return await get_pages_due_for_check()
         except Exception as e:
             logger.error(f"Error getting pages due for check: {e}")
             return []
             
-    async def _check_single_page(self, page, semaphore):
-        """Check a single page for changes"""
+    async def _check_single_page(self, page, semaphore, detected: list):
+        """Check a single page for changes; detected changes are appended to `detected`"""
         async with semaphore:
             try:
                 page_id = str(page["_id"])
                 url = page["url"]
                 
-                # Get current page content
-                current_content = await self._fetch_page_content(url)
+                # Get current page content (conditional on the validators from the last fetch)
+                result = await self._fetch_page_content(page)
+                checked_at = datetime.utcnow()  # One timestamp for every record this check writes
+                if result is UNCHANGED:
+                    # 304 Not Modified or byte-identical body: nothing parsed or compared
+                    self._page_writes.update_page(page_id, {"last_checked": checked_at})
+                    return
+                fetched, current_content = result or (None, None)
                 if not current_content:
                     logger.warning(f"Failed to fetch content for {url}")
                     return
+                validators = {"etag": fetched.etag, "last_modified": fetched.last_modified,
+                              "content_hash": fetched.content_hash}
                     
-                # Get the latest version for comparison
-                latest_version = get_latest_page_version(page_id)
-                old_content = latest_version.get("text_content", "") if latest_version else ""
-                
-                # Update last_checked timestamp
-                update_tracked_page(page_id, {"last_checked": datetime.utcnow()})
+                # ✅ CHECK IF CONTENT HAS CHANGED: compare 32-byte digests; the stored text is
+                # only pulled once a change has to be measured
+                latest_version = await get_latest_page_version(page_id, {"content_sha256": 1})
+                stored_digest = latest_version.get("content_sha256") if latest_version else None
+                unchanged = stored_digest is not None and stored_digest == text_digest(current_content)
+                old_content = ""
+                if latest_version and not unchanged:
+                    previous = await get_page_version(page_id, latest_version["_id"], {"text_content": 1})
+                    old_content = previous.get("text_content", "") if previous else ""
+                    if stored_digest is None:  # Stored before versions carried a digest
+                        unchanged = old_content == current_content
                 
-                # ✅ CHECK IF CONTENT HAS CHANGED
-                if latest_version and old_content == current_content:
-                    # No change detected
+                if unchanged:
+                    # No change detected: this content is stored, so its validators can be trusted
+                    self._page_writes.update_page(page_id, {"last_checked": checked_at, **validators})
+                    self._content_hashes[page_id] = fetched.content_hash
                     return
+                
+                # Update last_checked timestamp (validators wait until the new version is written)
+                self._page_writes.update_page(page_id, {"last_checked": checked_at})
                     
                 # ✅ CALCULATE CHANGE PERCENTAGE
                 change_percentage = self._calculate_change_percentage(old_content, current_content)
                 
-                # Create new version
-                new_version = create_page_version(
-                    page_id=page_id, 
-                    text_content=current_content, 
-                    url=url, 
-                    html_content=None
-                )
-                
-                if not new_version:
-                    logger.error(f"Failed to create version for page {page_id}")
-                    return
-                    
-                # ✅ SEND EMAIL NOTIFICATION IF ENABLED
-                if self.email_enabled and change_percentage > 0:
-                    await self._send_change_notification(
-                        page=page,
-                        change_percentage=change_percentage,
-                        new_version=new_version,
-                        old_content_length=len(old_content),
-                        new_content_length=len(current_content)
-                    )
-                
-                # Update page with new version ID
-                update_data = {
-                    "current_version_id": str(new_version["_id"]),
-                    "last_change_detected": datetime.utcnow()
-                }
-                update_tracked_page(page_id, update_data)
-                
-                # Create change log with change percentage
-                change_data = {
-                    "user_id": page["user_id"],
-                    "page_id": page_id,
-                    "change_type": "content_changed",
-                    "timestamp": datetime.utcnow(),
-                    "details": {
-                        "url": url,
-                        "content_length": len(current_content),
-                        "previous_length": len(old_content),
-                        "change_percentage": change_percentage,
-                        "notification_sent": self.email_enabled
-                    }
-                }
-                
-                change_log_id = create_change_log(change_data)
-                if change_log_id:
-                    logger.info(f"Change detected for page {page_id}: {url} ({change_percentage}% change)")
-                else:
-                    logger.error(f"Failed to create change log for page {page_id}")
+                detected.append({
+                    "page": page,
+                    "content": current_content,
+                    "old_content_length": len(old_content),
+                    "change_percentage": change_percentage,
+                    "detected_at": checked_at,
+                    "validators": validators,
+                })
                     
             except Exception as e:
                 logger.error(f"Error checking page {page.get('url', 'unknown')}: {e}")
     
+    async def _flush_detected_changes(self, detected: list):
+        """Write a sweep's versions and change logs with one insert_many each, then notify"""
+        if not detected:
+            return
+        
+        # Create new versions
+        new_versions = await bulk_create_page_versions([
+            {"page_id": str(item["page"]["_id"]), "text_content": item["content"],
+             "url": item["page"]["url"], "html_content": None,
+             "content_hash": item["validators"]["content_hash"], "timestamp": item["detected_at"]}
+            for item in detected
+        ])
+        versions_by_page = {version["page_id"]: version for version in new_versions}
+        
+        change_logs = []
+        for item in detected:
+            page = item["page"]
+            page_id = str(page["_id"])
+            new_version = versions_by_page.get(page["_id"])
+            if not new_version:
+                logger.error(f"Failed to create version for page {page_id}")
+                continue
+            
+            # ✅ SEND EMAIL NOTIFICATION IF ENABLED
+            if self.email_enabled and item["change_percentage"] > 0:
+                await self._send_change_notification(
+                    page=page,
+                    change_percentage=item["change_percentage"],
+                    new_version=new_version,
+                    old_content_length=item["old_content_length"],
+                    new_content_length=len(item["content"])
+                )
+            
+            # Update page with new version ID (written after the versions above exist)
+            self._page_writes.update_page(page_id, {
+                "current_version_id": str(new_version["_id"]),
+                "last_change_detected": item["detected_at"],
+                **item["validators"]
+            })
+            self._content_hashes[page_id] = item["validators"]["content_hash"]
+            
+            # Create change log with change percentage
+            change_logs.append({
+                "user_id": page["user_id"],
+                "page_id": page_id,
+                "change_type": "content_changed",
+                "timestamp": item["detected_at"],
+                "details": {
+                    "url": page["url"],
+                    "content_length": len(item["content"]),
+                    "previous_length": item["old_content_length"],
+                    "change_percentage": item["change_percentage"],
+                    "notification_sent": self.email_enabled
+                }
+            })
+        
+        logged = len(await bulk_create_change_logs(change_logs))
+        if logged == len(change_logs):
+            for change in change_logs:
+                logger.info(f"Change detected for page {change['page_id']}: {change['details']['url']} "
+                            f"({change['details']['change_percentage']}% change)")
+        else:
+            logger.error(f"Failed to create {len(change_logs) - logged} of {len(change_logs)} change logs")
+    
     # ✅ ADDED: CALCULATE CHANGE PERCENTAGE
     def _calculate_change_percentage(self, old_content: str, new_content: str) -> float:
         """Calculate percentage of content changed"""
@@ -568,7 +334,7 @@ class MonitoringScheduler:
         """Send email notification when page change is detected"""
         try:
             # Get user information
-            user = get_user_by_id(page["user_id"])
+            user = await get_user_by_id(page["user_id"])
             if not user or not user.get("email"):
                 logger.warning(f"No user or email found for page {page.get('_id')}")
                 return
@@ -594,8 +360,7 @@ class MonitoringScheduler:
                 change_severity = "Minor"
                 color = "#10b981"  # Green
             
-            # Get from email
-            from_email = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
+            from_email = EMAIL_CFG.from_email
             
             # Create email
             params = {
@@ -622,7 +387,8 @@ class MonitoringScheduler:
             }
             
             # Send email
-            email = resend.Emails.send(params)
+            # Resend's client is blocking HTTP: keep it off the loop the API may share
+            email = await asyncio.to_thread(get_resend().Emails.send, params)
             logger.info(f"✅ Change notification sent to {user_email} for {page_url} (ID: {email['id']})")
             return True
             
@@ -744,17 +510,20 @@ The content of this monitored page has changed.
 You're receiving this email because you're monitoring this page with FreshLense.
 Manage notification preferences in your account settings."""
                 
-    async def _fetch_page_content(self, url: str) -> Optional[str]:
-        """Fetch page content asynchronously using ContentFetcher"""
+    async def _fetch_page_content(self, page: dict):
+        """
+        Fetch page content asynchronously using ContentFetcher
+        Returns: (FetchedPage, text content), UNCHANGED on 304 or an identical body, or None
+        """
+        url = page["url"]
         try:
-            # Run the synchronous crawler in a thread pool
-            loop = asyncio.get_event_loop()
-            html, content = await loop.run_in_executor(
-                None, 
-                self.content_fetcher.fetch_and_extract, 
-                url
+            # Async fetch on the loop; parsing runs in the crawler's process pool
+            page_id = str(page["_id"])
+            return await self.content_fetcher.fetch_and_extract_page_async(
+                url,
+                conditional_headers(page.get("etag"), page.get("last_modified")),
+                known_hash=self._content_hashes.get(page_id) or page.get("content_hash")
             )
-            return content  # Return the extracted text content
         except Exception as e:
             logger.error(f"Error fetching content from {url}: {e}")
             return None
@@ -766,11 +535,14 @@ Manage notification preferences in your account settings."""
     def schedule_page(self, page_doc):
         """
         Schedule a page for monitoring (called when new page is created)
-        This is mainly for compatibility with main.py - the scheduler will pick up
-        new pages automatically on its next check cycle
+        Never-checked pages are due, so this only cuts the wait: the loop sweeps
+        WAKE_DELAY after the first call instead of at the end of check_interval,
+        and every page created in between goes out in that one sweep.
+        Only wakes a scheduler in this process; a separate worker finds new pages
+        through its NEW_PAGE_POLL query instead
         """
         logger.debug(f"Page scheduled for monitoring: {page_doc.get('url', 'unknown')}")
-        # No immediate action needed - scheduler will pick it up automatically
+        self._wake.set()  # Just a flag: nothing here runs on the request path
         
     @property 
     def is_running(self) -> bool:
@@ -1,6 +1,5 @@
 # backend/schemas/auth.py
 from pydantic import BaseModel, EmailStr, Field, field_validator
-import re
 
 class ForgotPasswordRequest(BaseModel):
     """Request schema for forgot password endpoint"""
@@ -9,10 +8,8 @@ class ForgotPasswordRequest(BaseModel):
     @field_validator('email')
     @classmethod
     def validate_email_format(cls, v):
-        """Additional email validation"""
-        if not re.match(r'[^@]+@[^@]+\.[^@]+', v):
-            raise ValueError('Invalid email format')
-        return v.lower().strip()  # Normalize email
+        """Normalize the address (EmailStr has already validated its format)"""
+        return v.lower().strip()
 
 class ForgotPasswordResponse(BaseModel):
     """Response schema for forgot password endpoint"""
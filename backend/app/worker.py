@@ -0,0 +1,53 @@
+# backend/app/worker.py
+"""
+Standalone monitoring worker - runs MonitoringScheduler outside the API process.
+
+Start from backend/ with `python -m app.worker` and set RUN_SCHEDULER=false on the
+API so crawls no longer share its event loop. Due pages are read from MongoDB on
+every sweep, so the database stays the only coordination point; run one worker.
+Pages added through the API are picked up within MonitoringScheduler.NEW_PAGE_POLL
+seconds (the API's schedule_page wake-up does not cross processes).
+"""
+import asyncio
+import logging
+import signal
+
+from dotenv import load_dotenv
+
+# ✅ Load environment variables from .env file
+load_dotenv()
+
+from .logging_config import setup_logging
+setup_logging(logging.WARNING)
+
+from .database import init_db, close_db
+from .scheduler import MonitoringScheduler
+from .crawler import shutdown_extract_pool
+
+
+async def run_worker():
+    """Run the scheduler loop until SIGINT/SIGTERM"""
+    scheduler = MonitoringScheduler()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
+
+    if not await init_db():  # Same motor client as the API, bound to this loop
+        print("❌ Monitoring worker: no database, sweeps will find nothing due")
+    await scheduler.start()
+    print("✅ Monitoring worker started")
+    try:
+        await stop.wait()
+    finally:
+        await scheduler.shutdown()
+        shutdown_extract_pool()
+        close_db()
+        print("🛑 Monitoring worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,24 @@
+# backend/gunicorn.conf.py
+"""
+Production server config: gunicorn managing uvicorn workers.
+
+    cd backend && gunicorn app.main:app -c gunicorn.conf.py
+
+UvicornWorker picks uvloop and httptools automatically when they are installed.
+Each worker is its own process with its own event loop, so the in-API scheduler
+is turned off here (it would run once per worker); run `python -m app.worker`
+alongside. Not preloaded: the Mongo client and HTTP pools must be created per worker.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+keepalive = 5
+timeout = 120  # Manual crawls can take a while on slow sites
+
+# Inherited by every worker (setdefault: explicit env vars still win)
+os.environ.setdefault("RUN_SCHEDULER", "false")
+# Split the CPU between the workers' extraction process pools instead of cpu_count each
+os.environ.setdefault("EXTRACT_POOL_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
@@ -1,4 +1,5 @@
 # backend/test_api.py
+# Runs against a live API on BASE_URL; start it first (JWT_SECRET must be set, see README)
 import requests
 import json
 import random
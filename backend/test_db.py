@@ -1,37 +1,41 @@
 # backend/test_db.py
+import asyncio
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 try:
-    from app.database import create_user, get_user_by_email, is_db_available
-    
-    if not is_db_available():
-        print("❌ MongoDB client is not available")
-    else:
-        print("✅ MongoDB connection is ready!")
-        
-        # Test user creation
-        test_user = {
-            "email": "test@example.com",
-            "password": "testpassword"
-        }
+    from app.database import create_user, get_user_by_email, init_db, is_db_available
 
-        user = create_user(test_user)
-        if user:
-            print(f"✅ User created: {user['email']}")
-            print(f"✅ User ID: {user['_id']}")
+    async def main():
+        if not await init_db() or not is_db_available():
+            print("❌ MongoDB client is not available")
+        else:
+            print("✅ MongoDB connection is ready!")
+
+            # Test user creation
+            test_user = {
+                "email": "test@example.com",
+                "password": "testpassword"
+            }
+
+            user = await create_user(test_user)
+            if user:
+                print(f"✅ User created: {user['email']}")
+                print(f"✅ User ID: {user['_id']}")
             
-            # Test retrieving user
-            retrieved_user = get_user_by_email("test@example.com")
-            if retrieved_user:
-                print(f"✅ User retrieved: {retrieved_user['email']}")
-                print(f"✅ User ID: {retrieved_user['_id']}")
+                # Test retrieving user
+                retrieved_user = await get_user_by_email("test@example.com")
+                if retrieved_user:
+                    print(f"✅ User retrieved: {retrieved_user['email']}")
+                    print(f"✅ User ID: {retrieved_user['_id']}")
+                else:
+                    print("❌ User not found")
             else:
-                print("❌ User not found")
-        else:
-            print("❌ User creation failed (might already exist)")
+                print("❌ User creation failed (might already exist)")
+
+    asyncio.run(main())
 
 except ImportError as e:
     print(f"❌ Import error: {e}")
@@ -1,4 +1,5 @@
 # backend/test_scheduler.py
+import asyncio
 import sys
 import os
 import time
@@ -21,7 +22,7 @@ def test_scheduler():
     
     # Create the page in database (using a test user ID)
     test_user_id = "000000000000000000000000"  # Dummy ID for testing
-    page = create_tracked_page(test_page, test_user_id)
+    page = asyncio.run(create_tracked_page(test_page, test_user_id))
     
     if not page:
         print("❌ Failed to create test page")
@@ -167,8 +167,11 @@ document.addEventListener('DOMContentLoaded', () => {
         const data = await response.json();
         if (!response.ok) throw new Error(data.detail || 'API request failed');
 
-        messageEl.textContent = 'Page tracked successfully!';
-        checkIfPageIsTracked(); 
+        // 201: newly tracked, 200: it already was - either way no need to ask /by-url again
+        messageEl.textContent = response.status === 201
+          ? 'Page tracked successfully!'
+          : 'This page is already being tracked.';
+        trackButton.textContent = 'Already Tracked';
       } catch (error) {
         messageEl.textContent = `Error: ${error.message}`;
         trackButton.disabled = false;
@@ -64,7 +64,7 @@ export interface PageVersion {
   id: string;
   page_id: string;
   timestamp: string;
-  text_content: string;
+  text_content?: string; // Only on getVersionContent; the versions list is metadata only
   metadata: {
     url: string;
     content_length: number;
@@ -91,9 +91,8 @@ export interface LoginResponse {
 export interface CrawlResponse {
   status: string;
   url: string;
-  content_length: number;
-  content_preview: string | null;
-  full_content: string;
+  text_content_length: number;
+  text_content: string | null;
 }
 
 export interface CrawlPageResponse {
@@ -167,7 +166,11 @@ export const pagesAPI = {
   // ✅ ADDED: Delete endpoint
   delete: (id: string) => api.delete<DeleteResponse>(`/pages/${id}`),
   
-  getVersions: (pageId: string) => api.get<PageVersion[]>(`/pages/${pageId}/versions`),
+  getVersions: (pageId: string, params?: { limit?: number; before?: string }) =>
+    api.get<PageVersion[]>(`/pages/${pageId}/versions`, { params }),
+
+  getVersionContent: (pageId: string, versionId: string) =>
+    api.get<PageVersion>(`/pages/${pageId}/versions/${versionId}/content`),
   
   // ✅ ADDED: Check if page is already tracked by URL
   getByUrl: (url: string) => api.get<TrackedPage>(`/pages/by-url?url=${encodeURIComponent(url)}`),